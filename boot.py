@@ -3,6 +3,7 @@ from .plugin import set_up, tear_down
 # main plugin classes
 from .plugin.sublime_text.AutoSetIndentation import *
 from .plugin.sublime_text.AutoSetIndentationCommand import *
+from .plugin.sublime_text.AutoSetIndentationPrintCacheStatsCommand import *
 
 
 def plugin_loaded() -> None:
@@ -1,9 +1,9 @@
 import os
 import sublime
 import sys
-from .functions import is_event_listener_enabled, set_indentation_for_view
 from .log import print_msg
-from .utils import is_view_normal_ready
+from .settings import unwatch_settings, watch_settings
+from .startup_detection import cancel_startup_detection, start_startup_detection
 
 # stupid python module system
 sys.path.append(os.path.join(os.path.dirname(__file__), "libs"))
@@ -19,16 +19,28 @@ def set_up() -> None:
             "So, you probably no longer needs this plugin in Sublime Text 4."
         )
 
+    # imported here since "libs" is not in sys.path before this module is loaded
+    from .editorconfig_lookup import apply_cache_settings
+    from .editorconfig_prewarm import prewarm_window
+
+    watch_settings(apply_cache_settings)
+    apply_cache_settings()
+
     # A dirty fix for "on_load_async" is not trigger on starting
     # @see https://github.com/SublimeTextIssues/Core/issues/5#issuecomment-476225021
+    # views are already ready before plugin has been loaded, they are handled in the background
+    # before prewarming so that they are not held up by walking folders
+    start_startup_detection()
+
     for window in sublime.windows():
-        for view in window.views():
-            # oops! view is already ready before plugin has been loaded
-            if is_view_normal_ready(view) and is_event_listener_enabled("on_load_async"):
-                set_indentation_for_view(view)
+        prewarm_window(window)
 
 
 def tear_down() -> None:
     """ plugin_unloaded """
 
-    pass
+    from .editorconfig_prewarm import cancel_all_prewarms
+
+    cancel_all_prewarms()
+    cancel_startup_detection()
+    unwatch_settings()
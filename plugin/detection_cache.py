@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple  # noqa: F401
+from .settings import get_setting
+
+# the plugin settings which the detected indentation depends on
+RESULT_SETTINGS_KEYS = (
+    "sample_windows",
+    "guessing_confidence",
+    "incremental_detection",
+    "editorconfig_lookup_boundary",
+    "editorconfig_user_config",
+)
+
+# buffer ID => (the key the result is valid for, (the indentation, its sources))
+_results = {}  # type: Dict[int, Tuple[Tuple[Any, ...], Tuple[Any, List[str]]]]
+
+
+def get_detection_key(
+    change_count: int,
+    file_path: Optional[str],
+    folders: Sequence[str],
+    sample_length: int,
+    editorconfig_state: Tuple[Any, ...],
+) -> Tuple[Any, ...]:
+    """
+    @brief Get the key which a detection result is valid for.
+           Settings values may be lists so keys are only compared rather than hashed.
+
+    @param change_count       The change count of the view
+    @param file_path          The file path of the view
+    @param folders            The folders of the window of the view
+    @param sample_length      The sample length
+    @param editorconfig_state The state of the .editorconfig files which may apply to the view
+
+    @return The key.
+    """
+
+    return (change_count, file_path, tuple(folders), sample_length, editorconfig_state) + tuple(
+        get_setting(key) for key in RESULT_SETTINGS_KEYS
+    )
+
+
+def get_detection_result(buffer_id: int, key: Tuple[Any, ...]) -> Optional[Tuple[Any, List[str]]]:
+    """
+    @brief Get the last detection result of the buffer if it is still valid.
+
+    @param buffer_id The buffer ID
+    @param key       The key of the detection
+
+    @return (the indentation, its sources) or None if there is no valid result.
+    """
+
+    entry = _results.get(buffer_id)
+
+    return entry[1] if entry and entry[0] == key else None
+
+
+def set_detection_result(buffer_id: int, key: Tuple[Any, ...], indent: Any, sources: List[str]) -> None:
+    _results[buffer_id] = (key, (indent, list(sources)))
+
+
+def drop_detection_result_for_buffer(buffer_id: int) -> None:
+    """
+    @brief Forget the last detection result of the buffer.
+
+    @param buffer_id The buffer ID
+    """
+
+    _results.pop(buffer_id, None)
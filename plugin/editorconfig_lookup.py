@@ -0,0 +1,167 @@
+import editorconfig
+import os
+from editorconfig.fnmatch import get_cache as get_pattern_cache
+from editorconfig.ini import config_file_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from .log import print_msg
+from .settings import get_setting
+
+# files or directories which mark the root of a repository
+VCS_MARKERS = (".git", ".hg", ".svn", ".bzr")
+
+# directory => the repository root which contains it (None if none)
+_vcs_roots = {}  # type: Dict[str, Optional[str]]
+
+
+def get_editorconfig_properties(file_path: str, folders: Sequence[str], keys: Iterable[str]) -> Dict[str, Any]:
+    """
+    @brief Get .editorconfig properties of a file, honoring the lookup boundary settings.
+
+    @param file_path The file path
+    @param folders   The folders of the window which the file belongs to
+    @param keys      The wanted properties
+
+    @return The properties.
+    """
+
+    boundaries, user_conf = get_lookup_options(file_path, folders)
+
+    return editorconfig.get_properties(file_path, keys=tuple(keys), boundaries=boundaries, user_conf=user_conf)
+
+
+def get_editorconfig_state(file_path: str, folders: Sequence[str]) -> Tuple[Any, ...]:
+    """
+    @brief Get the state of the .editorconfig files which may apply to a file,
+           so that a change to them, even from outside Sublime Text, can be told.
+           Files are served from the caches of the lookup, which parse a changed file into a new object
+           and do not probe a file known to be missing again.
+
+    @param file_path The file path
+    @param folders   The folders of the window which the file belongs to
+
+    @return The parsed files, which are compared by identity, None for missing ones.
+    """
+
+    boundaries, user_conf = get_lookup_options(file_path, folders)
+    handler = editorconfig.EditorConfigHandler(file_path, boundaries=boundaries, user_conf=user_conf)
+    state = []  # type: List[Any]
+
+    for conf_file in handler.get_conf_files():
+        config_file = config_file_cache.get(conf_file)
+        state.append(config_file)
+
+        if config_file and config_file.root_file:
+            break
+
+    return tuple(state)
+
+
+def get_lookup_options(file_path: str, folders: Sequence[str]) -> Tuple[List[str], Optional[str]]:
+    """
+    @brief Get the boundaries and the user config file of looking up .editorconfig files per settings.
+
+    @param file_path The file path
+    @param folders   The folders of the window which the file belongs to
+
+    @return (boundaries, user config file or None).
+    """
+
+    boundaries = get_lookup_boundaries(file_path, folders)
+    user_conf = None
+
+    if boundaries and get_setting("editorconfig_user_config", True):
+        user_conf = os.path.join(os.path.expanduser("~"), ".editorconfig")
+
+    return boundaries, user_conf
+
+
+def get_lookup_boundaries(file_path: str, folders: Sequence[str]) -> List[str]:
+    """
+    @brief Get directories where looking for .editorconfig files upward should stop.
+
+    @param file_path The file path
+    @param folders   The folders of the window which the file belongs to
+
+    @return The boundaries, an empty list means looking up to the filesystem root.
+    """
+
+    boundary = get_setting("editorconfig_lookup_boundary")
+
+    if boundary == "vcs":
+        vcs_root = find_vcs_root(os.path.dirname(file_path))
+
+        if vcs_root:
+            return [vcs_root]
+
+    if boundary == "vcs" or boundary == "project":
+        # the outermost folder so that no folder is cut off
+        project_folders = [folder for folder in folders if is_path_inside(file_path, folder)]
+
+        return [min(project_folders, key=len)] if project_folders else []
+
+    return []
+
+
+def find_vcs_root(dir_path: str) -> Optional[str]:
+    """
+    @brief Find the root of the repository which contains a directory.
+
+    @param dir_path The directory path
+
+    @return The repository root or None if the directory is not inside a repository.
+    """
+
+    visited = []  # type: List[str]
+    vcs_root = None  # type: Optional[str]
+
+    while True:
+        if dir_path in _vcs_roots:
+            vcs_root = _vcs_roots[dir_path]
+            break
+
+        visited.append(dir_path)
+
+        if any(os.path.exists(os.path.join(dir_path, marker)) for marker in VCS_MARKERS):
+            vcs_root = dir_path
+            break
+
+        parent = os.path.dirname(dir_path)
+
+        if parent == dir_path:
+            break
+
+        dir_path = parent
+
+    # every visited directory is inside the same repository
+    for visited_path in visited:
+        _vcs_roots[visited_path] = vcs_root
+
+    return vcs_root
+
+
+def is_path_inside(path: str, dir_path: str) -> bool:
+    dir_path = os.path.join(os.path.normcase(os.path.normpath(dir_path)), "")
+
+    return os.path.normcase(os.path.normpath(path)).startswith(dir_path)
+
+
+def apply_cache_settings() -> None:
+    """
+    @brief Resize the cache of compiled .editorconfig section patterns per settings.
+    """
+
+    get_pattern_cache().set_max_entries(max(int(get_setting("editorconfig_pattern_cache_size", 512)), 0))
+
+
+def print_cache_stats() -> None:
+    """
+    @brief Print the stats of the cache of compiled .editorconfig section patterns to the console.
+    """
+
+    stats = get_pattern_cache().stats()
+    lookups = stats["hits"] + stats["misses"]
+
+    print_msg(
+        "Pattern cache: {entries}/{max_entries} entries, {hits} hits, {misses} misses ({hit_rate:.1%} hit rate), "
+        "{evictions} evictions".format(hit_rate=stats["hits"] / lookups if lookups else 0.0, **stats)
+    )
@@ -0,0 +1,179 @@
+import fnmatch
+import os
+import sublime
+import time
+from editorconfig.ini import config_file_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple  # noqa: F401
+from .log import print_msg
+from .settings import get_setting
+
+# the max number of directories scanned before letting other tasks run
+PREWARM_DIRS_PER_STEP = 64
+
+# window ID => its running prewarm task
+_tasks = {}  # type: Dict[int, PrewarmTask]
+
+
+class PrewarmTask:
+    """ Parses every .editorconfig file under some folders into the cache, step by step in the async thread. """
+
+    def __init__(self, window_id: int, folders: Sequence[str], exclude_patterns: Sequence[str], max_files: int) -> None:
+        self.window_id = window_id
+        self.folders = list(folders)
+        self.exclude_patterns = list(exclude_patterns)
+        self.max_files = max_files
+        self.is_cancelled = False
+
+        self.num_dirs = 0
+        self.num_files = 0
+        self.num_config_files = 0
+        self.start_time = 0.0
+        self.work_time = 0.0
+
+        self._walks = iter(())  # type: Iterator[Tuple[str, List[str], List[str]]]
+
+    def start(self) -> None:
+        self.start_time = time.perf_counter()
+        self._walks = self.walk_folders()
+
+        sublime.set_timeout_async(self.step, 0)
+
+    def cancel(self) -> None:
+        self.is_cancelled = True
+
+    def step(self) -> None:
+        """
+        @brief Scan a few directories and schedule the next step, so that detections are not held up.
+        """
+
+        if self.is_cancelled:
+            self.finish("cancelled")
+            return
+
+        step_start_time = time.perf_counter()
+        status = "done"
+
+        for dir_path, _, file_names in self._walks:
+            self.num_dirs += 1
+            self.num_files += len(file_names)
+
+            config_file_path = os.path.join(dir_path, ".editorconfig")
+
+            if ".editorconfig" in file_names:
+                self.num_config_files += 1
+                config_file_cache.get(config_file_path)
+            else:
+                config_file_cache.missing_files.add(config_file_path)
+
+            if self.num_files >= self.max_files:
+                status = "stopped at {} files".format(self.max_files)
+                break
+
+            # further files would only evict the ones cached so far
+            if (
+                self.num_config_files >= config_file_cache.max_entries
+                or self.num_dirs - self.num_config_files >= config_file_cache.missing_files.max_entries
+            ):
+                status = "stopped at the cache capacity"
+                break
+
+            if self.num_dirs % PREWARM_DIRS_PER_STEP == 0:
+                status = ""
+                break
+
+        self.work_time += time.perf_counter() - step_start_time
+
+        if status:
+            self.finish(status)
+        else:
+            sublime.set_timeout_async(self.step, 0)
+
+    def finish(self, status: str) -> None:
+        if _tasks.get(self.window_id) is self:
+            del _tasks[self.window_id]
+
+        print_msg(
+            "Prewarming .editorconfig files {}: {} found in {} directories in {:.3f}s ({:.3f}s of work)".format(
+                status, self.num_config_files, self.num_dirs, time.perf_counter() - self.start_time, self.work_time
+            )
+        )
+
+    def walk_folders(self) -> Iterator[Tuple[str, List[str], List[str]]]:
+        for folder in self.folders:
+            for dir_path, dir_names, file_names in os.walk(folder):
+                # prune excluded directories in place so that they are not walked
+                dir_names[:] = [dir_name for dir_name in dir_names if not self.is_excluded(dir_name)]
+
+                yield dir_path, dir_names, file_names
+
+                if self.is_cancelled:
+                    return
+
+    def is_excluded(self, dir_name: str) -> bool:
+        return any(fnmatch.fnmatch(dir_name, pattern) for pattern in self.exclude_patterns)
+
+
+def prewarm_window(window: sublime.Window) -> None:
+    """
+    @brief Start parsing every .editorconfig file under the folders of the window in the background,
+           cancelling the window's previous prewarm if any.
+
+    @param window The window
+    """
+
+    cancel_prewarm(window.id())
+
+    folders = window.folders()
+
+    if not get_setting("editorconfig_prewarm") or not folders:
+        return
+
+    task = PrewarmTask(
+        window.id(),
+        folders,
+        get_folder_exclude_patterns(window),
+        int(get_setting("editorconfig_prewarm_max_files", 20000)),
+    )
+    _tasks[window.id()] = task
+    task.start()
+
+
+def cancel_prewarm(window_id: int) -> None:
+    """
+    @brief Cancel the running prewarm of a window if any.
+
+    @param window_id The window ID
+    """
+
+    task = _tasks.pop(window_id, None)  # type: Optional[PrewarmTask]
+
+    if task:
+        task.cancel()
+
+
+def cancel_all_prewarms() -> None:
+    for window_id in list(_tasks):
+        cancel_prewarm(window_id)
+
+
+def get_folder_exclude_patterns(window: sublime.Window) -> List[str]:
+    """
+    @brief Get the "folder_exclude_patterns" of Sublime Text and of the project folders of the window.
+
+    @param window The window
+
+    @return The patterns.
+    """
+
+    patterns = list(sublime.load_settings("Preferences.sublime-settings").get("folder_exclude_patterns", []))
+
+    project_data = window.project_data()
+    folders = project_data.get("folders") if isinstance(project_data, dict) else None
+
+    for folder in folders if isinstance(folders, list) else []:
+        folder_patterns = folder.get("folder_exclude_patterns") if isinstance(folder, dict) else None
+
+        if isinstance(folder_patterns, list):
+            patterns.extend(folder_patterns)
+
+    return patterns
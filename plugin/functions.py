@@ -1,5 +1,5 @@
 import sublime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from .settings import get_setting
 from .log import msg, print_msg, show_status_message
 
@@ -26,11 +26,12 @@ def is_view_set_by_editorconfig_plugin(view: sublime.View) -> bool:
     return bool(view.settings().get(EDITORCONFIG_PLUGIN_MARKER, False))
 
 
-def is_event_listener_enabled(event: str) -> bool:
+def is_event_listener_enabled(event: str, default: Optional[bool] = None) -> bool:
     """
     @brief Check if a event listener is enabled.
 
-    @param event The event
+    @param event   The event
+    @param default The value assumed silently if the event is not set, e.g., it is newer than user settings
 
     @return True if event listener enabled, False otherwise.
     """
@@ -38,6 +39,9 @@ def is_event_listener_enabled(event: str) -> bool:
     try:
         return bool(get_setting("event_listeners", {})[event])
     except KeyError:
+        if default is not None:
+            return default
+
         print_msg('"event_listeners[%s]" is not set in user settings (assumed false)' % event)
 
         return False
@@ -0,0 +1,146 @@
+import IndentFinder.indent_finder as indentfinder
+import sublime
+import sublime_plugin
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple  # noqa: F401
+
+# larger buffers are sampled instead since the histogram keeps a record of every line
+HISTOGRAM_MAX_SIZE = 2 ** 20
+
+# buffer ID => (the change count the histogram is in sync with, the histogram)
+_histograms = {}  # type: Dict[int, Tuple[int, Any]]
+
+# histograms are built and read in the async thread but updated in the main thread
+_histograms_lock = threading.Lock()
+
+
+def can_use_histogram_for_view(view: sublime.View) -> bool:
+    """
+    @brief Check whether the indentation histogram can be used for the view.
+           Without TextChangeListener (ST 3), the histogram would be built from the whole buffer on every detection.
+
+    @param view The view
+
+    @return True if the histogram can be used, False otherwise.
+    """
+
+    return hasattr(sublime_plugin, "TextChangeListener") and view.size() <= HISTOGRAM_MAX_SIZE
+
+
+def get_histogram_result_for_view(view: sublime.View, default_result: Tuple[str, int]) -> Any:
+    """
+    @brief Get the result of the up-to-date indentation histogram for the buffer of the view.
+           The histogram is built from the whole buffer if there is none or it is out of sync.
+
+    @param view           The view
+    @param default_result The default result of the IndentFinder
+
+    @return The IndentResult namedtuple.
+    """
+
+    buffer_id = view.buffer_id()
+    change_count = view.change_count()
+
+    with _histograms_lock:
+        entry = _histograms.get(buffer_id)
+        if entry and entry[0] == change_count:
+            return entry[1].result()
+
+    histogram = indentfinder.IncrementalIndentFinder(default_result)
+    histogram.parse_lines(view.substr(sublime.Region(0, view.size())).split("\n"))
+
+    with _histograms_lock:
+        # only keep it if the buffer has not been modified while building it
+        if view.change_count() == change_count:
+            _histograms[buffer_id] = (change_count, histogram)
+
+    return histogram.result()
+
+
+def update_histogram_for_buffer(buffer: "sublime.Buffer", changes: "Iterable[sublime.TextChange]") -> None:
+    """
+    @brief Update the indentation histogram of the buffer with modified lines only.
+
+    @param buffer  The buffer
+    @param changes The text changes
+    """
+
+    with _histograms_lock:
+        _update_histogram_for_buffer(buffer, changes)
+
+
+def _update_histogram_for_buffer(buffer: "sublime.Buffer", changes: "Iterable[sublime.TextChange]") -> None:
+    buffer_id = buffer.id()
+
+    entry = _histograms.get(buffer_id)
+    if not entry:
+        return
+
+    view = buffer.primary_view()
+
+    # the histogram has been built after these changes already
+    if view and entry[0] == view.change_count():
+        return
+
+    rows = merge_text_changes(changes)
+
+    if not view or not rows or view.size() > HISTOGRAM_MAX_SIZE:
+        _histograms.pop(buffer_id, None)
+        return
+
+    begin_row, old_end_row, new_end_row = rows
+    histogram = entry[1]
+
+    region = sublime.Region(view.text_point(begin_row, 0), view.line(view.text_point(new_end_row, 0)).end())
+    histogram.replace_lines(begin_row, old_end_row + 1, view.substr(region).split("\n"))
+
+    # something went wrong, e.g., we have missed some changes
+    if len(histogram.line_records) != view.rowcol(view.size())[0] + 1:
+        _histograms.pop(buffer_id, None)
+        return
+
+    _histograms[buffer_id] = (view.change_count(), histogram)
+
+
+def drop_histogram_for_buffer(buffer_id: int) -> None:
+    """
+    @brief Drop the indentation histogram of the buffer.
+
+    @param buffer_id The buffer ID
+    """
+
+    with _histograms_lock:
+        _histograms.pop(buffer_id, None)
+
+
+def merge_text_changes(changes: "Iterable[sublime.TextChange]") -> Optional[Tuple[int, int, int]]:
+    """
+    @brief Merge consecutive text changes into a single row range.
+
+    @param changes The text changes, which are applied in order
+
+    @return (begin row, end row before changes, end row after changes) with end rows inclusive,
+            or None if there is no change.
+    """
+
+    begin_row = old_end_row = new_end_row = -1
+
+    for change in changes:
+        a_row, b_row = change.a.row, change.b.row
+        new_b_row = a_row + change.str.count("\n")
+
+        if begin_row < 0:
+            begin_row, old_end_row, new_end_row = a_row, b_row, new_b_row
+            continue
+
+        # rows after the merged range are not modified so far
+        if b_row > new_end_row:
+            old_end_row += b_row - new_end_row
+
+        new_end_row = max(new_end_row, b_row) + new_b_row - b_row
+        begin_row = min(begin_row, a_row)
+
+    if begin_row < 0:
+        return None
+
+    return (begin_row, old_end_row, new_end_row)
@@ -9,13 +9,36 @@
 #
 # modifications done by jfcherng <jfcherng@gmail.com>
 #   - Add IndentFinder.parse_string()
+#   - Add IndentFinder.parse_buffer()
+#   - Add IncrementalIndentFinder
+#   - Add confidence-based early termination to IndentFinder.parse_buffer()
+#   - Add IndentFinder.parse_segments()
+#   - Add IndentHistogram and parallel chunked parsing
+#   - IndentFinder.parse_file() scans bytes of a memory-mapped file
+#   - Add a parallel batch mode to main()
+#   - Add IndentResult and memoize IndentFinder.results()
+#   - Integer coded line infos and counters
+#   - Optional NumPy backend for large buffers
 #
 
+import fnmatch
+import functools
+import json
+import mmap
+import os
 import sys
 import re
+import time
+
+try:
+    # optional, see IndentFinder.scan_buffer_vectorized()
+    import numpy
+except ImportError:
+    numpy = None
 
 help = \
-"""Usage : %s [ --vim-output ] [ --verbose ] file1 file2 ... fileN
+"""Usage : %s [ --vim-output ] [ --verbose ] [ --parallel[=N] ] file1 file2 ... fileN
+        %s [ --jobs[=N] ] [ --include=GLOB ... ] [ --exclude=GLOB ... ] path1 path2 ... pathN
 
 Display indentation used in the list of files. Possible answers are (with X
 being the number of spaces used for indentation):
@@ -31,6 +54,20 @@ for example. In my opinion, this is the worst possible style.
 --vim-output: output suitable to use inside vim:
 set sts=0 | set tabstop=4 | set noexpandtab | set shiftwidth=4
 
+--parallel[=N]: split each file into chunks which are parsed by N processes
+(defaults to the number of CPUs). Only worth it for very large files.
+
+Files of 1 MB or more are scanned with NumPy when it is installed.
+
+Batch mode is used when a directory is given or --jobs is used. Directories
+are walked recursively, files are processed by a pool of N processes (--jobs=N
+or --jobs N, defaults to the number of CPUs) and results are printed as JSON lines as soon as they
+are available. A throughput summary is printed to stderr at the end.
+
+--include=GLOB: only process files whose name or relative path matches GLOB
+--exclude=GLOB: skip files and directories whose name or relative path matches
+GLOB (%s are always skipped)
+
 """
 
 VERSION='1.4'
@@ -54,13 +91,73 @@ VERBOSE_DEEP_DEBUG   = 3
 
 DEFAULT_VERBOSITY = VERBOSE_QUIET
 
+### chunks of a file smaller than this are not worth a process
+PARALLEL_MIN_CHUNK_SIZE = 2**18
+
+### directories never walked into in batch mode
+BATCH_DEFAULT_EXCLUDES = ( '.git', '.hg', '.svn', '.bzr' )
+
 ###
 class LineType:
-    NoIndent        = 'NoIndent'
-    SpaceOnly       = 'SpaceOnly'
-    TabOnly         = 'TabOnly'
-    Mixed           = 'Mixed'
-    BeginSpace      = 'BeginSpace'
+    NoIndent        = 0
+    SpaceOnly       = 1
+    TabOnly         = 2
+    Mixed           = 3
+    BeginSpace      = 4
+
+    names = ( 'NoIndent', 'SpaceOnly', 'TabOnly', 'Mixed', 'BeginSpace' )
+
+### A line info is an int packing the LineType (bits 0-2), the number of
+# spaces of a Mixed line (bits 3-5) and the number of tabs or spaces of the
+# indentation (the tab part for a Mixed line). NoIndent lines are 0, lines
+# which are not significant have None.
+def line_info( line_type, length, extra=0 ):
+    return length << 6 | extra << 3 | line_type
+
+def format_line_info( line_info ):
+    if line_info is None:
+        return 'None'
+    line_type, extra, length = line_info & 7, line_info >> 3 & 7, line_info >> 6
+    if line_type == LineType.Mixed:
+        return '(%s, %d tabs, %d spaces)' % ( LineType.names[line_type], length, extra )
+    return '(%s, %d)' % ( LineType.names[line_type], length )
+
+### The counters are kept in a list, indexed as follows
+COUNTER_KEYS = tuple( 'space%d' % i for i in range(2,9) ) + tuple( 'mixed%d' % i for i in range(2,9) ) + ( 'tab', )
+SPACE_COUNTER = 0   # + indentation size - 2
+MIXED_COUNTER = 7   # + indentation size - 2
+TAB_COUNTER = 14
+
+### What a pair of lines contributes to the counters: the index of a counter,
+# SPACE_MIXED_CONTRIBUTION + indentation size - 2 for both the space and the
+# mixed counters of that size, or NO_CONTRIBUTION
+SPACE_MIXED_CONTRIBUTION = 15
+NO_CONTRIBUTION = -1
+# the indexes of the counters of each contribution, NO_CONTRIBUTION gives the last one
+CONTRIBUTION_COUNTERS = ( tuple( (i,) for i in range(15) ) + tuple( (i, MIXED_COUNTER + i) for i in range(7) )
+                          + ( (), ) )
+
+### How the indentation increment of a pair of lines is measured, indexed by
+# previous line type << 3 | current line type
+PAIR_NONE, PAIR_TAB, PAIR_SPACE, PAIR_SPACE_MIXED, PAIR_BEGIN_TAB, PAIR_TAB_MIXED, PAIR_MIXED_TAB = range(7)
+PAIR_RULES = [ PAIR_NONE ] * 64
+for previous_type, current_type, rule in (
+        ( LineType.TabOnly,     LineType.TabOnly,       PAIR_TAB ),
+        ( LineType.NoIndent,    LineType.TabOnly,       PAIR_TAB ),
+        ( LineType.SpaceOnly,   LineType.SpaceOnly,     PAIR_SPACE ),
+        ( LineType.BeginSpace,  LineType.SpaceOnly,     PAIR_SPACE ),
+        ( LineType.NoIndent,    LineType.SpaceOnly,     PAIR_SPACE ),
+        ( LineType.BeginSpace,  LineType.BeginSpace,    PAIR_SPACE_MIXED ),
+        ( LineType.NoIndent,    LineType.BeginSpace,    PAIR_SPACE_MIXED ),
+        ( LineType.BeginSpace,  LineType.TabOnly,       PAIR_BEGIN_TAB ),
+        ( LineType.TabOnly,     LineType.Mixed,         PAIR_TAB_MIXED ),
+        ( LineType.Mixed,       LineType.TabOnly,       PAIR_MIXED_TAB ) ):
+    PAIR_RULES[ previous_type << 3 | current_type ] = rule
+PAIR_RULES = tuple( PAIR_RULES )
+del previous_type, current_type, rule
+
+### the counter of a rule's indentation size 2
+PAIR_RULE_BASES = ( None, TAB_COUNTER, SPACE_COUNTER, SPACE_MIXED_CONTRIBUTION, MIXED_COUNTER, MIXED_COUNTER, MIXED_COUNTER )
 
 def info( s ): log( VERBOSE_INFO, s )
 def dbg( s ): log( VERBOSE_DEBUG, s )
@@ -70,6 +167,73 @@ def log( level, s ):
     if level <= IndentFinder.VERBOSITY:
         print( s )
 
+def visible( s ):
+    return s.replace( ' ', '.' ).replace( '\t', '\\t' ).replace( '\n', '\\n' )
+
+class IndentHistogram:
+    """
+    The counters collected from a chunk of consecutive lines, which can be
+    merged with the histogram of the chunk right after it.
+
+    Only the first lines of a chunk can be paired with lines of the previous
+    chunk: the first line, and the lines after it as long as the line before
+    ends in '\\'. They are kept as the head, together with what they have
+    contributed when parsed without previous chunk. The state left after the
+    last line is kept as the tail. Merging is associative, so chunks can be
+    parsed concurrently and merged in order.
+    """
+
+    __slots__ = ( 'counts', 'nb_processed_lines', 'nb_indent_hint', 'head', 'head_contributions',
+                  'head_terminated', 'tail_state' )
+
+    def __init__( self ):
+        self.counts = [0] * len(COUNTER_KEYS)
+        self.nb_processed_lines = 0
+        self.nb_indent_hint = 0
+        # [(line info, ends in '\\')] of the first lines
+        self.head = []
+        # contribution of each line of the head
+        self.head_contributions = []
+        # whether the head ends before the last line, i.e. the tail does not
+        # depend on previous chunks
+        self.head_terminated = False
+        # (last line ends in '\\', previous significant line info) after the last line
+        self.tail_state = (False, None)
+
+
+class IndentResult:
+    """
+    The structured result of an IndentFinder.
+
+    - type: 'space', 'tab', 'mixed' or the type of the default result
+    - size: the indentation size (the space part for mixed indentation)
+    - tab_width: the width of a tab
+    - counts: the counters the decision has been made from
+    """
+
+    def __init__( self, result, counts, nb_processed_lines, nb_indent_hint, confidence ):
+        self.type, value = result
+        if self.type == 'mixed':
+            self.tab_width, self.size = value
+        else:
+            self.tab_width = self.size = value
+        self.result = result
+        self.counts = counts
+        self.nb_processed_lines = nb_processed_lines
+        self.nb_indent_hint = nb_indent_hint
+        self.confidence = confidence
+
+    def __str__( self ):
+        if self.type != 'mixed':
+            return '%s %d' % (self.type, self.size)
+        else:
+            return '%s tab %d space %d' % (self.type, self.tab_width, self.size)
+
+    def __repr__( self ):
+        return '<IndentResult %s (%d lines, %d hints, confidence %.2f)>' % (
+            self, self.nb_processed_lines, self.nb_indent_hint, self.confidence )
+
+
 class IndentFinder:
     """
     IndentFinder reports the indentation used in a source file. Its approach
@@ -120,6 +284,9 @@ class IndentFinder:
     mail, if possible with the offending file.
     """
 
+    __slots__ = ( 'default_result', 'counts', 'nb_processed_lines', 'nb_indent_hint', 'early_terminated',
+                  'results_cache', 'skip_next_line', 'previous_line_info' )
+
     def __init__(self, default_result=DEFAULT_RESULT):
         self.clear()
         self.default_result = default_result
@@ -131,29 +298,495 @@ class IndentFinder:
         for line in string.splitlines():
             self.analyse_line( line )
 
-    def parse_file( self, fname ):
+    # leading blanks of indented lines: (tabs)(spaces)(anything else is garbage)
+    BUFFER_INDENT_RE = re.compile( "^(?=[ \t])(\t*)( *)[ \t]*", re.MULTILINE )
+    BYTES_INDENT_RE = re.compile( b"^(?=[ \t])(\t*)( *)[ \t]*", re.MULTILINE )
+    # leading blanks of a line followed by some text
+    LINE_INDENT_RE = re.compile( "(\t*)( *)[ \t]*(?=[^ \t])" )
+    BYTES_EOL_RE = re.compile( b"\n" )
+    # (line ending, backslash, comment starts) for str and bytes buffers
+    BUFFER_SYMBOLS = ( '\n', '\\', ( '*', '#' ), '/*' )
+    BYTES_SYMBOLS = ( b'\n', b'\\', ( b'*', b'#' ), b'/*' )
+    # line boundaries of str.splitlines() which are not handled by BUFFER_INDENT_RE
+    BUFFER_EXOTIC_EOL_RE = re.compile( "[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]" )
+
+    ### how many new indent hints between two confidence checks
+    CONFIDENCE_CHECK_INTERVAL = 32
+    ### pseudo count which keeps confidence() low when there are only a few hints
+    CONFIDENCE_PRIOR = 10
+
+    ### buffers from this size are scanned with NumPy, if available
+    VECTORIZE_MIN_SIZE = 2**20
+
+    def parse_buffer( self, string, confidence=None ):
+        """Same as parse_string() but scans the whole string at once.
+
+        Leading blanks are collected by a single regex pass and only indented
+        lines are visited from Python. The lines in between are only looked at
+        when they matter for the next indented line. This gives the very same
+        results as parse_string(), only much faster on large buffers.
+
+        If confidence (0.0 ~ 1.0) is given, parsing stops as soon as the
+        decision cannot be changed by the remaining lines anymore or
+        self.confidence() reaches it. nb_processed_lines then tells how many
+        lines have actually been consumed. Note that 1.0 can never be reached
+        so only the former condition applies, which keeps results identical.
+        """
+        self.clear()
+        self.feed_buffer( string, confidence )
+
+    def parse_segments( self, segments, confidence=None ):
+        """Parse several independent parts of a file, e.g. windows sampled
+        from different places. Counters are accumulated over all segments but
+        lines are never paired across segment boundaries."""
         self.clear()
-        with open( fname ) as file:
-            for line in file:
+        segments = [ self.normalize_eol( segment ) for segment in segments ]
+
+        # line counts are only needed to tell whether the remaining lines may change the decision
+        if confidence is not None:
+            nb_segment_lines = [ self.count_lines( segment ) for segment in segments ]
+        else:
+            nb_segment_lines = [ 0 ] * len(segments)
+        nb_following_lines = sum( nb_segment_lines )
+
+        for segment, nb_lines in zip( segments, nb_segment_lines ):
+            nb_following_lines -= nb_lines
+            if self.feed_buffer( segment, confidence, nb_following_lines ):
+                break
+
+    def normalize_eol( self, string ):
+        cr, lf = ( b'\r', b'\n' ) if isinstance( string, bytes ) else ( '\r', '\n' )
+        if cr in string:
+            string = string.replace( cr + lf, lf ).replace( cr, lf )
+        return string
+
+    def count_eol( self, buffer, start=0, end=None ):
+        """Count line endings of a buffer, which may be a mmap object."""
+        end = len(buffer) if end is None else end
+        if isinstance( buffer, mmap.mmap ):
+            # findall() only gives cached single-byte objects, no allocation per line
+            return len( self.BYTES_EOL_RE.findall( buffer, start, end ) )
+        return buffer.count( b'\n' if isinstance( buffer, bytes ) else '\n', start, end )
+
+    def count_lines( self, string ):
+        """Count lines of a string with normalized line endings."""
+        if self.BUFFER_EXOTIC_EOL_RE.search( string ):
+            return len( string.splitlines() )
+        return string.count( '\n' ) + ( string[-1:] not in ( '\n', '' ) )
+
+    def feed_buffer( self, string, confidence=None, nb_following_lines=0 ):
+        """Parse the string as an independent segment without clearing the
+        counters. See parse_buffer() for the details. nb_following_lines is
+        the number of lines which would be parsed after this segment.
+
+        Return True if parsing has been terminated early."""
+        string = self.normalize_eol( string )
+
+        # lines are never paired with the ones of a previous segment
+        self.skip_next_line = False
+        self.previous_line_info = None
+
+        if isinstance( string, str ) and self.BUFFER_EXOTIC_EOL_RE.search( string ):
+            # rare line boundaries, let splitlines() deal with them
+            for line in string.splitlines():
                 self.analyse_line( line )
+            return False
+
+        return self.scan_buffer( string, confidence, nb_following_lines )
+
+    def scan_buffer( self, string, confidence=None, nb_following_lines=0 ):
+        """The scanner behind feed_buffer(). The buffer may be a str, bytes or
+        a mmap object, whose line endings are all '\\n'."""
+        if not len(string):
+            return False
+
+        if numpy is not None and confidence is None and len(string) >= self.VECTORIZE_MIN_SIZE:
+            return self.scan_buffer_vectorized( string )
+
+        if isinstance( string, str ):
+            indent_re, ( eol, backslash, comment_chars, comment_start ) = self.BUFFER_INDENT_RE, self.BUFFER_SYMBOLS
+        else:
+            indent_re, ( eol, backslash, comment_chars, comment_start ) = self.BYTES_INDENT_RE, self.BYTES_SYMBOLS
+
+        length = len( string )
+        nb_lines = self.count_eol( string ) + ( string[-1:] != eol )
+        nb_previous_lines = self.nb_processed_lines
+        self.nb_processed_lines += nb_lines
+
+        slash = comment_start[:1]
+        counts = self.counts
+        pair_contribution = self.pair_contribution
+        previous_line_info = None
+        pos = 0 # start of the first line which has not been looked at yet
+        nb_checked_lines = 0 # number of lines before checked_pos
+        checked_pos = 0
+
+        for mo in indent_re.finditer( string ):
+            start, end = mo.span()
+
+            if pos < start:
+                # lines between the previous indented line and this one are not
+                # indented, only the last one which is not skipped matters
+                line_start = string.rfind( eol, 0, start - 1 ) + 1
+                while True:
+                    if line_start < 2 or string[line_start - 2:line_start - 1] != backslash:
+                        if string[line_start:line_start + 1] == eol:
+                            previous_line_info = None
+                        else:
+                            previous_line_info = LineType.NoIndent
+                        break
+                    if line_start <= pos:
+                        # every line in between is skipped
+                        break
+                    line_start = string.rfind( eol, 0, line_start - 1 ) + 1
+
+            line_end = string.find( eol, end )
+            if line_end < 0:
+                line_end = length
+            pos = line_end + 1
+
+            if start >= 2 and string[start - 2:start - 1] == backslash:
+                # skip lines after lines ending in \
+                continue
+
+            current_line_info = None
+            if end < line_end:
+                first_char = string[end:end + 1]
+                if first_char not in comment_chars and not (
+                        first_char == slash and string[end:end + 2] == comment_start ):
+                    tab_end = mo.end(1)
+                    space_end = mo.end(2)
+                    if space_end == end:
+                        # see indent_info()
+                        if space_end == tab_end:
+                            current_line_info = ( tab_end - start ) << 6 | LineType.TabOnly
+                        elif tab_end == start:
+                            current_line_info = ( end - start ) << 6 | (
+                                LineType.BeginSpace if end - start < 8 else LineType.SpaceOnly )
+                        elif end - tab_end < 8:
+                            current_line_info = ( tab_end - start ) << 6 | ( end - tab_end ) << 3 | LineType.Mixed
+
+            # lines indented the same way never contribute
+            if ( previous_line_info is not None and current_line_info is not None
+                 and previous_line_info != current_line_info ):
+                contribution = pair_contribution( previous_line_info, current_line_info )
+                if contribution >= 0:
+                    if contribution < SPACE_MIXED_CONTRIBUTION:
+                        counts[contribution] += 1
+                    else:
+                        counts[contribution - SPACE_MIXED_CONTRIBUTION] += 1
+                        counts[contribution - SPACE_MIXED_CONTRIBUTION + MIXED_COUNTER] += 1
+                    self.nb_indent_hint += 1
+                    if confidence is not None and self.nb_indent_hint % self.CONFIDENCE_CHECK_INTERVAL == 0:
+                        nb_checked_lines += self.count_eol( string, checked_pos, pos )
+                        checked_pos = pos
+                        nb_consumed_lines = min( nb_checked_lines + (pos > length), nb_lines )
+                        if ( self.is_decision_final( nb_lines - nb_consumed_lines + nb_following_lines )
+                             or self.confidence() >= confidence ):
+                            self.nb_processed_lines = nb_previous_lines + nb_consumed_lines
+                            self.early_terminated = True
+                            info( "Early termination after %d lines" % self.nb_processed_lines )
+                            return True
+            previous_line_info = current_line_info
+
+        return False
+
+    def scan_buffer_vectorized( self, string ):
+        """Same as scan_buffer() without early termination, but the lines are
+        classified and paired by vectorized NumPy operations on the bytes of
+        the buffer instead of being visited from Python."""
+        if isinstance( string, str ):
+            # only ASCII characters matter, which are unchanged by UTF-8
+            string = string.encode( 'utf-8', 'surrogatepass' )
+        chars = numpy.frombuffer( string, dtype=numpy.uint8 )
+        length = len(chars)
+        if not length:
+            return False
+
+        eol_positions = numpy.flatnonzero( chars == ord('\n') )
+        starts = numpy.concatenate( ( [0], eol_positions + 1 ) )
+        if starts[-1] == length:
+            starts = starts[:-1]
+        ends = numpy.append( eol_positions, length )[:len(starts)]
+        self.nb_processed_lines += len(starts)
+
+        # the buffer is terminated so that runs of characters always end
+        padded = numpy.append( chars, [0, 0] )
+
+        def run_end( positions, char ):
+            # the end of the run of char starting at each of positions, only
+            # lines still in their indentation are advanced at each step
+            run_ends = positions.copy()
+            active = numpy.flatnonzero( padded[ run_ends ] == char )
+            while len(active):
+                run_ends[ active ] += 1
+                active = active[ padded[ run_ends[ active ] ] == char ]
+            return run_ends
+
+        tab_end = run_end( starts, ord('\t') )
+        space_end = run_end( tab_end, ord(' ') )
+        first_char = padded[ space_end ]
+        second_char = padded[ space_end + 1 ]
+
+        # see scan_buffer(), a blank after the spaces is a garbage mixture
+        is_comment = ( ( first_char == ord('*') ) | ( first_char == ord('#') )
+                       | ( ( first_char == ord('/') ) & ( second_char == ord('*') ) ) )
+        is_garbage = ( first_char == ord('\t') ) | ( first_char == ord(' ') )
+
+        nb_tab = ( tab_end - starts ).astype( numpy.int64 )
+        nb_space = ( space_end - tab_end ).astype( numpy.int64 )
+        is_indented = space_end > starts
+        is_significant = numpy.where(
+            is_indented,
+            ( space_end < ends ) & ~is_comment & ~is_garbage & ( ( nb_tab == 0 ) | ( nb_space < 8 ) ),
+            ends > starts )
+
+        # see indent_info()
+        line_types = numpy.select(
+            [ ~is_indented, nb_space == 0, nb_tab == 0 ],
+            [ LineType.NoIndent, LineType.TabOnly,
+              numpy.where( nb_space < 8, LineType.BeginSpace, LineType.SpaceOnly ) ],
+            LineType.Mixed )
+        line_infos = numpy.select(
+            [ ~is_indented, nb_space == 0, nb_tab == 0 ],
+            [ 0, nb_tab << 6, nb_space << 6 ],
+            nb_tab << 6 | nb_space << 3 ) | line_types
+
+        # lines after lines ending in \ are skipped, the other ones are paired
+        # with the previous line which is not skipped
+        ends_in_backslash = ( ends > starts ) & ( padded[ ends - 1 ] == ord('\\') )
+        is_skipped = numpy.append( [False], ends_in_backslash[:-1] )
+        unskipped = numpy.flatnonzero( ~is_skipped )
+        previous_lines, current_lines = unskipped[:-1], unskipped[1:]
+        is_pair = is_significant[ previous_lines ] & is_significant[ current_lines ]
+        previous_infos = line_infos[ previous_lines[ is_pair ] ]
+        current_infos = line_infos[ current_lines[ is_pair ] ]
+
+        # see pair_contribution()
+        rules = numpy.array( PAIR_RULES )[ ( previous_infos & 7 ) << 3 | current_infos & 7 ]
+        previous_length, current_length = previous_infos >> 6, current_infos >> 6
+        nb_space = numpy.select(
+            [ rules == PAIR_TAB, ( rules == PAIR_SPACE ) | ( rules == PAIR_SPACE_MIXED ),
+              rules == PAIR_BEGIN_TAB, rules == PAIR_TAB_MIXED, rules == PAIR_MIXED_TAB ],
+            # TAB_COUNTER has no size, 2 makes it count
+            [ numpy.where( current_length - previous_length == 1, 2, 0 ),
+              current_length - previous_length,
+              numpy.where( current_length == 1, 8 - previous_length, 0 ),
+              numpy.where( previous_length == current_length, current_infos >> 3 & 7, 0 ),
+              numpy.where( previous_length + 1 == current_length, 8 - ( previous_infos >> 3 & 7 ), 0 ) ],
+            0 )
+        contributions = ( numpy.array( [ base or 0 for base in PAIR_RULE_BASES ] )[ rules ]
+                          + nb_space - 2 )[ ( 1 < nb_space ) & ( nb_space <= 8 ) ]
+
+        both = contributions >= SPACE_MIXED_CONTRIBUTION
+        counter_indexes = numpy.concatenate( (
+            contributions[ ~both ],
+            contributions[ both ] - SPACE_MIXED_CONTRIBUTION,
+            contributions[ both ] - SPACE_MIXED_CONTRIBUTION + MIXED_COUNTER ) )
+        for index, count in enumerate( numpy.bincount( counter_indexes, minlength=len(COUNTER_KEYS) ) ):
+            self.counts[ index ] += int( count )
+        self.nb_indent_hint += len(contributions)
+        return False
+
+    def parse_chunk( self, string ):
+        """Parse a chunk of a file and return its IndentHistogram. Chunks have
+        to be split at line boundaries, the line ending staying in the chunk.
+        The chunk may be bytes, whose lines only end in '\\n'."""
+        string = self.normalize_eol( string )
+        self.parse_buffer( string )
+
+        if isinstance( string, bytes ):
+            # a line is analysed the same once each byte is decoded to a character
+            forward_lines = ( line.decode( 'latin-1' ) for line in self.iter_lines( string ) )
+            backward_lines = ( line.decode( 'latin-1' ) for line in self.iter_lines( string, True ) )
+        elif self.BUFFER_EXOTIC_EOL_RE.search( string ):
+            lines = string.splitlines()
+            forward_lines, backward_lines = iter( lines ), reversed( lines )
+        else:
+            forward_lines, backward_lines = self.iter_lines( string ), self.iter_lines( string, True )
+
+        histogram = IndentHistogram()
+        histogram.counts = list( self.counts )
+        histogram.nb_processed_lines = self.nb_processed_lines
+        histogram.nb_indent_hint = self.nb_indent_hint
+
+        for line in forward_lines:
+            histogram.head.append( ( self.analyse_line_type( line ), line[-1:] == '\\' ) )
+            if len(histogram.head) >= 2 and not histogram.head[-2][1]:
+                histogram.head_terminated = True
+                break
+
+        histogram.head_contributions, tail_state = self.replay_records( (False, None), histogram.head )
+
+        if histogram.head_terminated:
+            # the last line which is not skipped gives the previous significant line
+            last_line = current_line = next( backward_lines )
+            for line in backward_lines:
+                if line[-1:] != '\\':
+                    break
+                current_line = line
+            tail_state = ( last_line[-1:] == '\\', self.analyse_line_type( current_line ) )
+
+        histogram.tail_state = tail_state
+        return histogram
+
+    def iter_lines( self, string, backward=False ):
+        """Iterate lines of a string with normalized line endings, like
+        string.splitlines() does, without splitting the whole string. The
+        string may also be bytes or a mmap object, lines are bytes then."""
+        if not string:
+            return
+        eol = '\n' if isinstance( string, str ) else b'\n'
+        if backward:
+            end = len(string) - ( string[-1:] == eol )
+            while end >= 0:
+                start = string.rfind( eol, 0, end ) + 1
+                yield string[start:end]
+                end = start - 1
+        else:
+            start = 0
+            while start < len(string):
+                end = string.find( eol, start )
+                if end < 0:
+                    end = len(string)
+                yield string[start:end]
+                start = end + 1
+
+    def replay_records( self, state, records ):
+        """Analyse [(line info, ends in '\\')] from the given state, which is
+        (skip the first line, previous significant line info).
+
+        Return (contribution of each record, state after the records)."""
+        contributions = []
+        for current_line_info, ends_in_backslash in records:
+            skip_current_line, previous_line_info = state
+            contribution = NO_CONTRIBUTION
+            if skip_current_line:
+                # skip lines after lines ending in \
+                current_line_info = previous_line_info
+            elif current_line_info is not None and previous_line_info is not None:
+                contribution = self.pair_contribution( previous_line_info, current_line_info )
+            contributions.append( contribution )
+            state = ( ends_in_backslash, current_line_info )
+        return contributions, state
+
+    def merge_histograms( self, left, right ):
+        """Merge histograms of two consecutive chunks into a new one."""
+        if not left.head:
+            return right
+        if not right.head:
+            return left
+
+        merged = IndentHistogram()
+        merged.counts = [ a + b for a, b in zip( left.counts, right.counts ) ]
+        merged.nb_processed_lines = left.nb_processed_lines + right.nb_processed_lines
+        merged.nb_indent_hint = left.nb_indent_hint + right.nb_indent_hint
+
+        # the head of the right chunk follows the left chunk now
+        head_contributions, tail_state = self.replay_records( left.tail_state, right.head )
+        for old_contribution, new_contribution in zip( right.head_contributions, head_contributions ):
+            for index in CONTRIBUTION_COUNTERS[ old_contribution ]:
+                merged.counts[ index ] -= 1
+            for index in CONTRIBUTION_COUNTERS[ new_contribution ]:
+                merged.counts[ index ] += 1
+            merged.nb_indent_hint += ( new_contribution >= 0 ) - ( old_contribution >= 0 )
+
+        merged.tail_state = right.tail_state if right.head_terminated else tail_state
+
+        if left.head_terminated:
+            merged.head, merged.head_contributions = left.head, left.head_contributions
+            merged.head_terminated = True
+        else:
+            # the head goes on in the right chunk
+            nb_head_lines = len(right.head) if left.tail_state[0] else 1
+            merged.head = left.head + right.head[:nb_head_lines]
+            merged.head_contributions = left.head_contributions + head_contributions[:nb_head_lines]
+            merged.head_terminated = not left.tail_state[0] or right.head_terminated
+
+        return merged
+
+    def load_histogram( self, histogram ):
+        """Set the counters from a histogram so that results() decides on it."""
+        self.clear()
+        self.counts = list( histogram.counts )
+        self.nb_processed_lines = histogram.nb_processed_lines
+        self.nb_indent_hint = histogram.nb_indent_hint
+
+    def parse_buffer_parallel( self, string, nb_jobs=None, chunk_size=None ):
+        """Same as parse_buffer() but chunks are parsed concurrently by a pool
+        of nb_jobs processes (defaults to the number of CPUs). The string may
+        be bytes, see parse_file_parallel()."""
+        nb_jobs = nb_jobs or os.cpu_count() or 1
+        chunk_size = max( chunk_size or len(string) // ( nb_jobs * 4 ), PARALLEL_MIN_CHUNK_SIZE )
+        eol = b'\n' if isinstance( string, bytes ) else '\n'
+
+        chunks = []
+        start = 0
+        while start < len(string):
+            end = string.find( eol, start + chunk_size ) + 1 or len(string)
+            chunks.append( string[start:end] )
+            start = end
+
+        if nb_jobs <= 1 or len(chunks) <= 1:
+            self.parse_buffer( string )
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor( nb_jobs ) as executor:
+            histograms = list( executor.map( parse_chunk, chunks ) )
+
+        self.load_histogram( functools.reduce( self.merge_histograms, histograms ) )
+
+    def parse_file_parallel( self, fname, nb_jobs=None, chunk_size=None ):
+        """Same as parse_file() but chunks are parsed concurrently, see
+        parse_buffer_parallel(). The file is not decoded either."""
+        with open( fname, 'rb' ) as file:
+            self.parse_buffer_parallel( self.normalize_eol( file.read() ), nb_jobs, chunk_size )
+
+    def parse_file( self, fname ):
+        """Parse a file without decoding it: indentation only depends on ASCII
+        spaces, tabs and line endings, so the bytes of the memory-mapped file
+        are scanned directly. Files which cannot be mapped are read instead."""
+        self.clear()
+        with open( fname, 'rb' ) as file:
+            try:
+                buffer = mmap.mmap( file.fileno(), 0, access=mmap.ACCESS_READ )
+            except ( ValueError, OSError ):
+                # e.g. empty files, pipes
+                self.scan_buffer( self.normalize_eol( file.read() ) )
+                return
+
+            with buffer:
+                if buffer.find( b'\r' ) < 0:
+                    self.scan_buffer( buffer )
+                else:
+                    # mapped memory is read-only, line endings are normalized in a copy
+                    self.scan_buffer( self.normalize_eol( buffer[:] ) )
 
     def clear( self ):
-        self.lines = {}
-        for i in range(2,9): self.lines['space%d' % i] = 0
-        for i in range(2,9): self.lines['mixed%d' % i] = 0
-        self.lines['tab'] = 0
+        # indexed as COUNTER_KEYS
+        self.counts = [0] * len(COUNTER_KEYS)
 
         self.nb_processed_lines = 0
         self.nb_indent_hint = 0
-        self.indent_re  = re.compile( "^([ \t]+)([^ \t]+)" )
-        self.mixed_re  = re.compile(  "^(\t+)( +)$" )
+        self.early_terminated = False
+        # (counters signature, results(), result())
+        self.results_cache = ( None, None, None )
         self.skip_next_line = False
         self.previous_line_info = None
 
+    @property
+    def lines( self ):
+        """The counters by name: {'space2': ..., 'mixed2': ..., 'tab': ...}"""
+        return dict( zip( COUNTER_KEYS, self.counts ) )
+
     def analyse_line( self, line ):
         if line[-1:] == '\n':
             line = line[:-1]
-        deepdbg( 'analyse_line: "%s"' % line.replace(' ', '.' ).replace('\t','\\t') )
+        deep_debug = IndentFinder.VERBOSITY >= VERBOSE_DEEP_DEBUG
+        if deep_debug:
+            deepdbg( 'analyse_line: "%s"' % visible( line ) )
         self.nb_processed_lines += 1
 
         skip_current_line = self.skip_next_line
@@ -168,153 +801,199 @@ class IndentFinder:
             return
 
         ret = self.analyse_line_indentation( line )
-        if ret:
+        if ret is not None:
             self.nb_indent_hint += 1
-        deepdbg( 'analyse_line: Result of line analysis: %s' % str(ret) )
+        if deep_debug:
+            deepdbg( 'analyse_line: Result of line analysis: %s' % ( COUNTER_KEYS[ ret ] if ret is not None else None ) )
         return ret
 
     def analyse_line_type( self, line ):
-        """Analyse the type of line and return (LineType, <indentation part of
-        the line>).
+        """Analyse the type of line and return its line info, see line_info().
 
         The function will reject improperly formatted lines (mixture of tab
         and space for example) and comment lines.
         """
-        mixed_mode = False
-        tab_part = ''
-        space_part = ''
-
         if len(line) > 0 and line[0] != ' ' and line[0] != '\t':
-            return (LineType.NoIndent, '')
+            return LineType.NoIndent
 
-        mo = self.indent_re.match( line )
+        mo = self.LINE_INDENT_RE.match( line )
         if not mo:
             deepdbg( 'analyse_line_type: line is not indented' )
             return None
 
-        indent_part = mo.group(1)
-        text_part = mo.group(2)
-
-        deepdbg( 'analyse_line_type: indent_part="%s" text_part="%s"' %
-            (indent_part.replace(' ', '.').replace('\t','\\t').replace('\n', '\\n' ),
-                text_part ) )
+        end = mo.end()
+        if IndentFinder.VERBOSITY >= VERBOSE_DEEP_DEBUG:
+            deepdbg( 'analyse_line_type: indent_part="%s" text_part="%s"' % ( visible( line[:end] ), line[end:] ) )
 
-        if text_part[0] == '*':
+        if line[end] == '*':
             # continuation of a C/C++ comment, unlikely to be indented correctly
             return None
 
-        if text_part[0:2] == '/*' or text_part[0] == '#':
+        if line[end:end + 2] == '/*' or line[end] == '#':
             # python, C/C++ comment, might not be indented correctly
             return None
 
-        if '\t' in indent_part and ' ' in indent_part:
-            # mixed mode
-            mo = self.mixed_re.match( indent_part )
-            if not mo:
-                # line is not composed of '\t\t\t    ', ignore it
-                return None
-            mixed_mode = True
-            tab_part = mo.group(1)
-            space_part = mo.group(2)
-
-        if mixed_mode:
-            if len(space_part) >= 8:
-                # this is not mixed mode, this is garbage !
-                return None
-            return (LineType.Mixed, tab_part, space_part )
-
-        if '\t' in indent_part:
-            return (LineType.TabOnly, indent_part)
-
-        if ' ' in indent_part:
-            if len(indent_part) < 8:
+        if mo.end(2) != end:
+            # line is not composed of '\t\t\t    ', ignore it
+            return None
+
+        return self.indent_info( mo.end(1), end - mo.end(1) )
+
+    def indent_info( self, nb_tab, nb_space ):
+        """Return the line info of an indentation made of nb_tab tabs followed
+        by nb_space spaces, or None if it is garbage."""
+        if not nb_space:
+            return line_info( LineType.TabOnly, nb_tab )
+
+        if not nb_tab:
+            if nb_space < 8:
                 # this could be mixed mode too
-                return (LineType.BeginSpace, indent_part)
+                return line_info( LineType.BeginSpace, nb_space )
             else:
                 # this is really a line indented with spaces
-                return (LineType.SpaceOnly, indent_part )
+                return line_info( LineType.SpaceOnly, nb_space )
 
-        assert False, 'We should never get there !'
+        if nb_space >= 8:
+            # this is not mixed mode, this is garbage !
+            return None
+        return line_info( LineType.Mixed, nb_tab, nb_space )
 
     def analyse_line_indentation( self, line ):
         previous_line_info = self.previous_line_info
         current_line_info = self.analyse_line_type( line )
         self.previous_line_info = current_line_info
 
-        if current_line_info == None or previous_line_info == None:
-            deepdbg('analyse_line_indentation: Not enough line info to analyse line: %s, %s' % (str(previous_line_info), str(current_line_info)))
+        if current_line_info is None or previous_line_info is None:
+            if IndentFinder.VERBOSITY >= VERBOSE_DEEP_DEBUG:
+                deepdbg( 'analyse_line_indentation: Not enough line info to analyse line: %s, %s' % (
+                    format_line_info( previous_line_info ), format_line_info( current_line_info ) ) )
             return
 
-        t = (previous_line_info[0], current_line_info[0])
-        deepdbg( 'analyse_line_indentation: Indent analysis: %s %s' % t )
-        if (t == (LineType.TabOnly, LineType.TabOnly)
-            or t == (LineType.NoIndent, LineType.TabOnly) ):
-            if len(current_line_info[1]) - len(previous_line_info[1]) == 1 :
-                self.lines['tab'] += 1
-                return 'tab'
-
-        elif (t == (LineType.SpaceOnly, LineType.SpaceOnly)
-              or t == (LineType.BeginSpace, LineType.SpaceOnly)
-              or t == (LineType.NoIndent, LineType.SpaceOnly) ):
-            nb_space = len(current_line_info[1]) - len(previous_line_info[1])
-            if 1 < nb_space <= 8:
-                key = 'space%d' % nb_space
-                self.lines[key] += 1
-                return key
-
-        elif (t == (LineType.BeginSpace, LineType.BeginSpace)
-              or t == (LineType.NoIndent, LineType.BeginSpace) ):
-            nb_space = len(current_line_info[1]) - len(previous_line_info[1])
-            if 1 < nb_space <= 8:
-                key1 = 'space%d' % nb_space
-                key2 = 'mixed%d' % nb_space
-                self.lines[ key1 ] += 1
-                self.lines[ key2 ] += 1
-                return key1
-
-        elif t == (LineType.BeginSpace, LineType.TabOnly):
+        return self.analyse_line_pair( previous_line_info, current_line_info )
+
+    def analyse_line_pair( self, previous_line_info, current_line_info ):
+        """Record the indentation increment between two consecutive significant
+        lines. Return the index of the first increased counter, if any."""
+        contribution = self.pair_contribution( previous_line_info, current_line_info )
+        if contribution < 0:
+            return None
+        counters = CONTRIBUTION_COUNTERS[ contribution ]
+        for index in counters:
+            self.counts[ index ] += 1
+        return counters[0]
+
+    def pair_contribution( self, previous_line_info, current_line_info ):
+        """Return what the indentation increment between two consecutive
+        significant lines contributes to the counters, see CONTRIBUTION_COUNTERS."""
+        rule = PAIR_RULES[ ( previous_line_info & 7 ) << 3 | current_line_info & 7 ]
+        if IndentFinder.VERBOSITY >= VERBOSE_DEEP_DEBUG:
+            deepdbg( 'pair_contribution: Indent analysis: %s %s' % (
+                LineType.names[ previous_line_info & 7 ], LineType.names[ current_line_info & 7 ] ) )
+        if rule == PAIR_NONE:
+            return NO_CONTRIBUTION
+
+        previous_length = previous_line_info >> 6
+        current_length = current_line_info >> 6
+
+        if rule == PAIR_TAB:
+            if current_length - previous_length == 1:
+                return TAB_COUNTER
+            return NO_CONTRIBUTION
+
+        if rule == PAIR_SPACE or rule == PAIR_SPACE_MIXED:
+            nb_space = current_length - previous_length
+
+        elif rule == PAIR_BEGIN_TAB:
             # we assume that mixed indentation used 8 characters tabs
-            if len(current_line_info[1]) == 1:
+            if current_length != 1:
                 # more than one tab on the line --> not mixed mode !
-                nb_space = len(current_line_info[1])*8 - len(previous_line_info[1])
-                if 1 < nb_space <= 8:
-                    key = 'mixed%d' % nb_space
-                    self.lines[ key ] += 1
-                    return key
-
-        elif t == (LineType.TabOnly, LineType.Mixed):
-            tab_part, space_part = tuple(current_line_info[1:3])
-            if len(previous_line_info[1]) == len(tab_part):
-                nb_space = len(space_part)
-                if 1 < nb_space <= 8:
-                    key = 'mixed%d' % nb_space
-                    self.lines[ key ] += 1
-                    return key
-
-        elif t == (LineType.Mixed, LineType.TabOnly):
-            tab_part, space_part = previous_line_info[1:3]
-            if len(tab_part)+1 == len(current_line_info[1]):
-                nb_space = 8-len(space_part)
-                if 1 < nb_space <= 8:
-                    key = 'mixed%d' % nb_space
-                    self.lines[ key ] += 1
-                    return key
+                return NO_CONTRIBUTION
+            nb_space = 8 - previous_length
+
+        elif rule == PAIR_TAB_MIXED:
+            if previous_length != current_length:
+                return NO_CONTRIBUTION
+            nb_space = current_line_info >> 3 & 7
+
+        else: # PAIR_MIXED_TAB
+            if previous_length + 1 != current_length:
+                return NO_CONTRIBUTION
+            nb_space = 8 - ( previous_line_info >> 3 & 7 )
+
+        if 1 < nb_space <= 8:
+            return PAIR_RULE_BASES[ rule ] + nb_space - 2
+        return NO_CONTRIBUTION
+
+    def bucket_counts( self ):
+        """Return the counters grouped as used by results():
+        ([space2..space8], [mixed2..mixed8], tab)"""
+        counts = self.counts
+        return counts[SPACE_COUNTER:SPACE_COUNTER + 7], counts[MIXED_COUNTER:MIXED_COUNTER + 7], counts[TAB_COUNTER]
+
+    def decision_counts( self ):
+        """Return (top, runner-up) of the space/mixed/tab buckets and
+        (top, runner-up) of the indentation sizes in the top bucket."""
+        spaces, mixeds, tab = self.bucket_counts()
+        buckets = sorted( [ max(spaces), max(mixeds), tab ], reverse=True )
+        if buckets[0] == max(spaces):
+            sizes = sorted( spaces, reverse=True )
+        elif buckets[0] == max(mixeds):
+            sizes = sorted( mixeds, reverse=True )
         else:
-            pass
-
-        return None
+            # tab indentation has no size to decide
+            sizes = [ buckets[0], 0 ]
+        return ( buckets[0], buckets[1] ), ( sizes[0], sizes[1] )
+
+    def confidence( self ):
+        """Return how confident (0.0 ~ 1.0) the current decision is, based on
+        the margin between the top candidate and the runner-up."""
+        confidence = 1.0
+        for top, runner_up in self.decision_counts():
+            margin = float( top - runner_up ) / ( top + runner_up + self.CONFIDENCE_PRIOR )
+            confidence = min( confidence, margin )
+        return confidence
+
+    def is_decision_final( self, nb_remaining_lines ):
+        """Return True if the result cannot change whatever the given number
+        of remaining lines contains. Each line adds at most 1 to a counter."""
+        ( top, runner_up ), ( top_size, runner_up_size ) = self.decision_counts()
+        if top <= runner_up + nb_remaining_lines:
+            return False
+        # results() prefers another size only if it has 10% more lines
+        return top_size > int( ( runner_up_size + nb_remaining_lines ) * 1.1 )
+
+    def counters_signature( self ):
+        """A cheap snapshot of the counters, which tells whether they have
+        changed since a result was computed."""
+        return ( self.nb_processed_lines, self.nb_indent_hint, tuple( self.counts ) )
 
     def results( self ):
+        """Return the decision as (type, value), which is computed only once
+        as long as the counters do not change."""
+        signature = self.counters_signature()
+        if self.results_cache[0] != signature:
+            self.results_cache = ( signature, self.compute_results(), None )
+        return self.results_cache[1]
+
+    def result( self ):
+        """Return the decision as an IndentResult, see results()."""
+        results = self.results()
+        if self.results_cache[2] is None:
+            self.results_cache = self.results_cache[:2] + ( IndentResult(
+                results, self.lines, self.nb_processed_lines, self.nb_indent_hint, self.confidence() ), )
+        return self.results_cache[2]
+
+    def compute_results( self ):
         dbg( "Nb of scanned lines : %d" % self.nb_processed_lines )
         dbg( "Nb of indent hint : %d" % self.nb_indent_hint )
         dbg( "Collected data:" )
-        for key in self.lines:
-            if self.lines[key] > 0:
-                dbg( '%s: %d' % (key, self.lines[key] ) )
+        for key, count in zip( COUNTER_KEYS, self.counts ):
+            if count > 0:
+                dbg( '%s: %d' % (key, count ) )
 
-        max_line_space = max( [ self.lines['space%d'%i] for i in range(2,9) ] )
-        max_line_mixed = max( [ self.lines['mixed%d'%i] for i in range(2,9) ] )
-        max_line_tab = self.lines['tab']
+        spaces, mixeds, max_line_tab = self.bucket_counts()
+        max_line_space = max( spaces )
+        max_line_mixed = max( mixeds )
 
         dbg( 'max_line_space: %d' % max_line_space )
         dbg( 'max_line_mixed: %d' % max_line_mixed )
@@ -364,9 +1043,9 @@ class IndentFinder:
             nb = 0
             indent_value = None
             for i in range(8,1,-1):
-                if self.lines['space%d'%i] > int( nb * 1.1 ) : # give a 10% threshold
+                if spaces[i - 2] > int( nb * 1.1 ) : # give a 10% threshold
                     indent_value = i
-                    nb = self.lines[ 'space%d' % indent_value ]
+                    nb = spaces[ indent_value - 2 ]
 
             if indent_value is None: # no lines
                 result = self.default_result
@@ -382,9 +1061,9 @@ class IndentFinder:
             nb = 0
             indent_value = None
             for i in range(8,1,-1):
-                if self.lines['mixed%d'%i] > int( nb * 1.1 ) : # give a 10% threshold
+                if mixeds[i - 2] > int( nb * 1.1 ) : # give a 10% threshold
                     indent_value = i
-                    nb = self.lines[ 'mixed%d' % indent_value ]
+                    nb = mixeds[ indent_value - 2 ]
 
             if indent_value is None: # no lines
                 result = self.default_result
@@ -399,12 +1078,7 @@ class IndentFinder:
         return result
 
     def __str__ (self):
-        itype, ival = self.results()
-        if itype != 'mixed':
-            return '%s %d' % (itype, ival)
-        else:
-            itab, ispace = ival
-            return '%s tab %d space %d' % (itype, itab, ispace)
+        return str( self.result() )
 
     def vim_output( self ):
         result = self.results()
@@ -435,30 +1109,328 @@ class IndentFinder:
             return "set sts=4 | set tabstop=%d | set noexpandtab | set shiftwidth=%d \" (%s %d)" % (tab_indent, space_indent, indent_type, space_indent )
 
 
+class IncrementalIndentFinder( IndentFinder ):
+    """
+    IndentFinder which remembers what every line contributes to the counters,
+    so that modified lines can be re-analysed without parsing everything again.
+
+    Lines are given without their line ending. Replacing a range of lines
+    retracts the contributions of the old lines, commits the ones of the new
+    lines and then re-analyses the following lines only as long as the state
+    carried from line to line (whether the line is skipped and the previous
+    significant line) differs from what it was before the modification.
+    """
+
+    __slots__ = ( 'line_records', )
+
+    # the state carried to the first line of a segment
+    INITIAL_STATE = ( False, None )
+
+    def clear( self ):
+        IndentFinder.clear( self )
+        # one record per line: [line info, ends in '\\', previous significant line info after it, contribution]
+        # where "ends in '\\'" is None for the last line of a segment, which carries no state to the next line
+        self.line_records = []
+
+    def parse_lines( self, lines ):
+        self.clear()
+        self.replace_lines( 0, 0, lines )
+
+    def parse_string( self, string ):
+        self.parse_lines( string.splitlines() )
+
+    def parse_buffer( self, string, confidence=None ):
+        """Same as parse_string(). confidence is ignored since every line has
+        to be recorded, there is no early termination."""
+        self.parse_lines( string.splitlines() )
+
+    def parse_segments( self, segments, confidence=None ):
+        """Same as IndentFinder.parse_segments() but confidence is ignored,
+        see parse_buffer(). Lines of the segments are recorded one after
+        another and are never paired across segment boundaries. A boundary
+        is kept when lines are replaced, unless the replaced range spans it."""
+        self.clear()
+        segments = [ lines for lines in ( segment.splitlines() for segment in segments ) if lines ]
+
+        for index, lines in enumerate( segments ):
+            self.replace_lines( len(self.line_records), len(self.line_records), lines )
+            if index < len(segments) - 1:
+                self.line_records[-1][1] = None
+
+    def parse_file( self, fname ):
+        """Same as IndentFinder.parse_file(), the file is not decoded either.
+        Each byte of a line is analysed as a character, see parse_chunk()."""
+        with open( fname, 'rb' ) as file:
+            try:
+                buffer = mmap.mmap( file.fileno(), 0, access=mmap.ACCESS_READ )
+            except ( ValueError, OSError ):
+                # e.g. empty files, pipes
+                self.parse_byte_lines( self.normalize_eol( file.read() ) )
+                return
+
+            with buffer:
+                if buffer.find( b'\r' ) < 0:
+                    self.parse_byte_lines( buffer )
+                else:
+                    # mapped memory is read-only, line endings are normalized in a copy
+                    self.parse_byte_lines( self.normalize_eol( buffer[:] ) )
+
+    def parse_byte_lines( self, buffer ):
+        """Parse bytes or a mmap object whose line endings are all '\\n'."""
+        self.parse_lines( line.decode( 'latin-1' ) for line in self.iter_lines( buffer ) )
+
+    def insert_lines( self, begin, lines ):
+        return self.replace_lines( begin, begin, lines )
+
+    def remove_lines( self, begin, end ):
+        return self.replace_lines( begin, end, [] )
+
+    def replace_lines( self, begin, end, lines ):
+        """Replace the lines in [begin, end) with the given lines and update
+        the counters accordingly. Return the number of analysed lines."""
+        records = self.line_records
+        begin = max( 0, min( begin, len(records) ) )
+        end = max( begin, min( end, len(records) ) )
+
+        state = self.record_state( records[begin - 1] ) if begin > 0 else self.INITIAL_STATE
+        old_state = self.record_state( records[end - 1] ) if end > begin else state
+        is_segment_end = end > begin and records[end - 1][1] is None
+
+        for record in records[begin:end]:
+            self.retract_contribution( record[3] )
+
+        new_records = []
+        for line in lines:
+            record = [ self.analyse_line_type( line ), line[-1:] == '\\', None, NO_CONTRIBUTION ]
+            self.analyse_record( record, state )
+            state = self.record_state( record )
+            new_records.append( record )
+
+        # the replaced lines still end their segment
+        if is_segment_end and ( new_records or begin > 0 ):
+            ( new_records[-1] if new_records else records[begin - 1] )[1] = None
+            state = self.INITIAL_STATE
+
+        records[begin:end] = new_records
+        self.nb_processed_lines = len(records)
+
+        # propagate the new state to the following lines until it converges
+        index = begin + len(new_records)
+        while index < len(records) and state != old_state:
+            record = records[index]
+            old_state = self.record_state( record )
+            self.retract_contribution( record[3] )
+            self.analyse_record( record, state )
+            state = self.record_state( record )
+            index += 1
+
+        return index - begin
+
+    def analyse_record( self, record, state ):
+        """Compute the contribution of a line record given the state left by
+        the line before it, and commit it to the counters."""
+        skip_current_line, previous_line_info = state
+        current_line_info = record[0]
+        if skip_current_line:
+            # skip lines after lines ending in \
+            record[2] = previous_line_info
+            record[3] = NO_CONTRIBUTION
+            return
+
+        record[2] = current_line_info
+        if current_line_info is None or previous_line_info is None:
+            record[3] = NO_CONTRIBUTION
+        else:
+            record[3] = self.pair_contribution( previous_line_info, current_line_info )
+        self.commit_contribution( record[3] )
+
+    def record_state( self, record ):
+        if record[1] is None:
+            return self.INITIAL_STATE
+        return ( record[1], record[2] )
+
+    def commit_contribution( self, contribution ):
+        if contribution >= 0:
+            self.nb_indent_hint += 1
+            for index in CONTRIBUTION_COUNTERS[ contribution ]:
+                self.counts[ index ] += 1
+
+    def retract_contribution( self, contribution ):
+        if contribution >= 0:
+            self.nb_indent_hint -= 1
+            for index in CONTRIBUTION_COUNTERS[ contribution ]:
+                self.counts[ index ] -= 1
+
+
+def parse_chunk( string ):
+    """Process pool entry of IndentFinder.parse_buffer_parallel()"""
+    return IndentFinder().parse_chunk( string )
+
+
+def detect_file( fname ):
+    """Process pool entry of batch_main(), return the result of a file as a dict."""
+    record = { 'file': fname }
+    try:
+        record['bytes'] = os.path.getsize( fname )
+        fi = IndentFinder()
+        fi.parse_file( fname )
+        result = fi.result()
+    except ( OSError, ValueError ) as e:
+        record['error'] = str( e )
+        return record
+
+    record['type'] = result.type
+    record['size'] = result.size
+    record['tab_width'] = result.tab_width
+    record['result'] = str( result )
+    record['lines'] = result.nb_processed_lines
+    record['hints'] = result.nb_indent_hint
+    record['confidence'] = round( result.confidence, 3 )
+    return record
+
+
+def is_path_matched( path, rel_path, globs ):
+    name = os.path.basename( path )
+    return any( fnmatch.fnmatch( name, glob ) or fnmatch.fnmatch( rel_path, glob ) for glob in globs )
+
+
+def walk_files( paths, includes=(), excludes=() ):
+    """Yield files of the given paths, directories being walked recursively."""
+    excludes = tuple( excludes ) + BATCH_DEFAULT_EXCLUDES
+    for path in paths:
+        if not os.path.isdir( path ):
+            yield path
+            continue
+
+        for dirpath, dirnames, filenames in os.walk( path ):
+            rel_dirpath = os.path.relpath( dirpath, path )
+            dirnames[:] = sorted(
+                dirname for dirname in dirnames
+                if not is_path_matched( dirname, os.path.normpath( os.path.join( rel_dirpath, dirname ) ), excludes )
+            )
+            for filename in sorted( filenames ):
+                fname = os.path.join( dirpath, filename )
+                rel_fname = os.path.normpath( os.path.join( rel_dirpath, filename ) )
+                if includes and not is_path_matched( fname, rel_fname, includes ):
+                    continue
+                if is_path_matched( fname, rel_fname, excludes ):
+                    continue
+                yield fname
+
+
+def batch_main( paths, nb_jobs=None, includes=(), excludes=() ):
+    """Detect indentation of many files with a process pool. Results are
+    printed as JSON lines in completion order."""
+    nb_jobs = nb_jobs or os.cpu_count() or 1
+    stats = { 'files': 0, 'bytes': 0, 'errors': 0 }
+    start_time = time.time()
+
+    def output( record ):
+        stats['files'] += 1
+        stats['bytes'] += record.get( 'bytes', 0 )
+        stats['errors'] += 'error' in record
+        sys.stdout.write( json.dumps( record ) + "\n" )
+        sys.stdout.flush()
+
+    files = walk_files( paths, includes, excludes )
+
+    if nb_jobs <= 1:
+        for fname in files:
+            output( detect_file( fname ) )
+    else:
+        from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+        with ProcessPoolExecutor( nb_jobs ) as executor:
+            # only keep a few tasks per worker pending so huge trees are not queued at once
+            pending = set()
+            for fname in files:
+                pending.add( executor.submit( detect_file, fname ) )
+                if len(pending) < nb_jobs * 4:
+                    continue
+                done, pending = wait( pending, return_when=FIRST_COMPLETED )
+                for future in done:
+                    output( future.result() )
+
+            while pending:
+                done, pending = wait( pending, return_when=FIRST_COMPLETED )
+                for future in done:
+                    output( future.result() )
+
+    elapsed = max( time.time() - start_time, 1e-9 )
+    sys.stderr.write( "%d files (%d errors), %.1f MB in %.2f s with %d jobs: %.1f files/s, %.2f MB/s\n" % (
+        stats['files'], stats['errors'], stats['bytes'] / 1e6, elapsed, nb_jobs,
+        stats['files'] / elapsed, stats['bytes'] / 1e6 / elapsed ) )
+
+
+def parse_jobs( value ):
+    """Return the number of jobs given as the value of --jobs or --parallel,
+    the number of CPUs if it is empty, None if it is not a positive number."""
+    try:
+        nb_jobs = int( value or os.cpu_count() or 1 )
+    except ValueError:
+        return None
+    return nb_jobs if nb_jobs >= 1 else None
+
+
 def main():
     VIM_OUTPUT = 0
+    PARALLEL_JOBS = 0
+    BATCH_JOBS = None
+    INCLUDES = []
+    EXCLUDES = []
 
+    usage = help % ( sys.argv[0], sys.argv[0], ', '.join( BATCH_DEFAULT_EXCLUDES ) )
     file_list = []
-    for opt in sys.argv[1:]:
+    args = sys.argv[1:]
+    index = 0
+    while index < len(args):
+        opt = args[index]
+        index += 1
         if opt == "--vim-output":
             VIM_OUTPUT = 1
         elif opt == "--verbose" or opt == '-v':
             IndentFinder.VERBOSITY += 1
+        elif opt == "--parallel" or opt.startswith( "--parallel=" ):
+            PARALLEL_JOBS = parse_jobs( opt.partition( "=" )[2] )
+            if PARALLEL_JOBS is None:
+                print( usage )
+                return
+        elif opt == "--jobs" or opt.startswith( "--jobs=" ):
+            value = opt.partition( "=" )[2]
+            # --jobs N
+            if opt == "--jobs" and index < len(args) and args[index].isdigit():
+                value = args[index]
+                index += 1
+            BATCH_JOBS = parse_jobs( value )
+            if BATCH_JOBS is None:
+                print( usage )
+                return
+        elif opt.startswith( "--include=" ):
+            INCLUDES.append( opt.partition( "=" )[2] )
+        elif opt.startswith( "--exclude=" ):
+            EXCLUDES.append( opt.partition( "=" )[2] )
         elif opt == "--version":
             print( 'IndentFinder v%s' % VERSION )
             return
         elif opt[0] == "-":
-            print( help % sys.argv[0] )
+            print( usage )
             return
         else:
             file_list.append( opt )
 
+    if BATCH_JOBS is not None or any( os.path.isdir( fname ) for fname in file_list ):
+        batch_main( file_list, BATCH_JOBS, INCLUDES, EXCLUDES )
+        return
+
     fi = IndentFinder()
 
     one_file = (len(file_list) == 1)
 
     for fname in file_list:
-        fi.parse_file( fname )
+        if PARALLEL_JOBS:
+            fi.parse_file_parallel( fname, PARALLEL_JOBS )
+        else:
+            fi.parse_file( fname )
 
         if not one_file:
             if VIM_OUTPUT:
@@ -3,16 +3,36 @@
 from editorconfig.versiontools import join_version
 from editorconfig.version import VERSION
 
-__all__ = ['get_properties', 'EditorConfigError', 'exceptions']
+__all__ = ['get_properties', 'get_properties_batch', 'EditorConfigError',
+           'exceptions']
 
 __version__ = join_version(VERSION)
 
 
-def get_properties(filename):
-    """Locate and parse EditorConfig files for the given filename"""
-    handler = EditorConfigHandler(filename)
-    return handler.get_configurations()
+def get_properties(filename, keys=None, boundaries=(), user_conf=None):
+    """Locate and parse EditorConfig files for the given filename
 
+    If ``keys`` is given, only these properties are returned and the lookup
+    stops as soon as they are all determined. See ``EditorConfigHandler``
+    for ``boundaries`` and ``user_conf``.
+    """
+    handler = EditorConfigHandler(filename, boundaries=boundaries,
+                                  user_conf=user_conf)
+    return handler.get_configurations(keys)
 
-from editorconfig.handler import EditorConfigHandler
+
+def get_properties_batch(filenames, keys=None, boundaries=(), user_conf=None,
+                         errors=None):
+    """Locate and parse EditorConfig files for many filenames at once
+
+    Return an OrderedDict of the properties of each filename. Files shared
+    by filenames are only looked up once. See ``get_properties`` for the
+    other arguments and ``EditorConfigBatchHandler`` for ``errors``.
+    """
+    handler = EditorConfigBatchHandler(filenames, boundaries=boundaries,
+                                       user_conf=user_conf)
+    return handler.get_configurations(keys, errors)
+
+
+from editorconfig.handler import EditorConfigBatchHandler, EditorConfigHandler
 from editorconfig.exceptions import *
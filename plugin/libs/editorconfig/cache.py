@@ -0,0 +1,226 @@
+"""EditorConfig caches
+
+Provides ``FileCache`` which keeps the parsed content of files for the whole
+process, so that opening many files from the same tree does not read and
+parse the same EditorConfig files again and again, ``MissingFileCache``
+which remembers where there is no such file, and ``LRUCache``, a bounded
+mapping with hit/miss/eviction counters.
+
+Licensed under Simplified BSD License (see LICENSE.BSD file).
+
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+__all__ = ['FileCache', 'LRUCache', 'MissingFileCache']
+
+
+class LRUCache(object):
+
+    """
+    Bounded mapping which evicts the least recently used entries
+
+    Lookups and evictions are counted, see ``stats()``.
+
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            self._evict()
+
+    def set_max_entries(self, max_entries):
+        """Change the capacity, evicting least recently used entries"""
+        with self.lock:
+            self.max_entries = max_entries
+            self._evict()
+
+    def stats(self):
+        """Return a dict of the size, the capacity and the counters"""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _evict(self):
+        while len(self.entries) > max(self.max_entries, 0):
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class MissingFileCache(object):
+
+    """
+    Bounded cache of files which do not exist
+
+    A file is trusted to be missing for ``ttl`` seconds without touching the
+    filesystem. After that, the modification time of its directory is
+    checked: the entry is renewed if it has not changed, i.e. no file has
+    been created in the directory, otherwise the file has to be probed again.
+
+    """
+
+    def __init__(self, ttl=30.0, max_entries=4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # filename => (expiration time, mtime of the directory)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __contains__(self, filename):
+        with self.lock:
+            entry = self.entries.get(filename)
+        if entry is None:
+            return False
+
+        expiration, dir_mtime = entry
+        if time.monotonic() < expiration:
+            return True
+
+        if self._get_dir_mtime(filename) != dir_mtime:
+            self.discard(filename)
+            return False
+
+        with self.lock:
+            self.entries[filename] = (time.monotonic() + self.ttl, dir_mtime)
+            self.entries.move_to_end(filename)
+        return True
+
+    def add(self, filename):
+        """Remember that filename does not exist"""
+        dir_mtime = self._get_dir_mtime(filename)
+        with self.lock:
+            self.entries[filename] = (time.monotonic() + self.ttl, dir_mtime)
+            self.entries.move_to_end(filename)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, filename):
+        with self.lock:
+            self.entries.pop(filename, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _get_dir_mtime(filename):
+        try:
+            return os.stat(os.path.dirname(filename)).st_mtime_ns
+        except (OSError, ValueError):
+            # the directory is missing as well
+            return None
+
+
+class FileCache(object):
+
+    """
+    LRU cache of the content of files, as returned by ``loader(filename)``
+
+    Entries are validated against the modification time and the size of the
+    file on every lookup, so a modified file is loaded again. Whatever the
+    loader returns is cached, including content which has failed to parse,
+    so that a broken file is not parsed again until it changes. Files which
+    cannot be stat'ed are remembered in ``missing_files``.
+
+    """
+
+    def __init__(self, loader, max_entries=256, missing_files=None):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.missing_files = (MissingFileCache() if missing_files is None
+                              else missing_files)
+
+    def get(self, filename):
+        """Return the loaded content of filename or None if it cannot be
+        stat'ed"""
+        if filename in self.missing_files:
+            return None
+
+        try:
+            stat = os.stat(filename)
+        except (OSError, ValueError):
+            with self.lock:
+                self.entries.pop(filename, None)
+            self.missing_files.add(filename)
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.entries.get(filename)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(filename)
+                return entry[1]
+
+        # loaded out of the lock, the file may be slow to read
+        content = self.loader(filename)
+
+        with self.lock:
+            self.entries[filename] = (signature, content)
+            self.entries.move_to_end(filename)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return content
+
+    def set_max_entries(self, max_entries):
+        """Change the capacity, evicting least recently used entries"""
+        with self.lock:
+            self.max_entries = max_entries
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, filename):
+        """Forget anything known about filename, e.g. when it is created"""
+        with self.lock:
+            self.entries.pop(filename, None)
+        self.missing_files.discard(filename)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        self.missing_files.clear()
+
+    def __len__(self):
+        return len(self.entries)
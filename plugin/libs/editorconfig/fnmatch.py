@@ -15,15 +15,25 @@ Licensed under PSF License (see LICENSE.PSF file).
 
 Changes to original fnmatch module:
 - translate function supports ``*`` and ``**`` similarly to fnmatch C library
+- compile_matcher function returns a precompiled matcher of a pattern
+- compile_multi_matcher function matches many patterns at once
+- compiled patterns are kept in a bounded LRU cache, see ``get_cache()``
+- numeric ranges are translated into regular expressions of their own, so
+  that matching is a single regex match, and translate function takes time
+  linear in the length of the pattern
+- patterns which cannot be compiled, e.g. nested too deeply, never match
 """
 
 import os
 import re
 
+from editorconfig.cache import LRUCache
 
-__all__ = ["fnmatch", "fnmatchcase", "translate"]
 
-_cache = {}
+__all__ = ["fnmatch", "fnmatchcase", "compile_matcher",
+           "compile_multi_matcher", "get_cache", "normalize", "translate"]
+
+_cache = LRUCache(max_entries=512)
 
 LEFT_BRACE = re.compile(
     r"""
@@ -80,16 +90,35 @@ def fnmatch(name, pat):
     If you don't want this, use fnmatchcase(FILENAME, PATTERN).
     """
 
-    name = os.path.normpath(name).replace(os.sep, "/")
-    return fnmatchcase(name, pat)
+    return fnmatchcase(normalize(name), pat)
+
+
+def normalize(name):
+    """Normalize FILENAME as fnmatch() does before matching it."""
+    return os.path.normpath(name).replace(os.sep, "/")
+
+
+def get_cache():
+    """Return the LRU cache of compiled patterns, e.g. to resize it or to
+    get its stats."""
+    return _cache
+
+
+# what a pattern which cannot be compiled is compiled to
+NEVER_MATCHING = re.compile(r'(?s)(?!)\Z')
 
 
 def cached_translate(pat):
-    if not pat in _cache:
-        res, num_groups = translate(pat)
-        regex = re.compile(res)
-        _cache[pat] = regex, num_groups
-    return _cache[pat]
+    regex = _cache.get(pat)
+    if regex is None:
+        try:
+            regex = re.compile(translate(pat))
+        except (re.error, OverflowError, RuntimeError):
+            # invalid, or nested too deeply for the re module (RuntimeError
+            # before Python 3.5 is RecursionError since then)
+            regex = NEVER_MATCHING
+        _cache.set(pat, regex)
+    return regex
 
 
 def fnmatchcase(name, pat):
@@ -99,16 +128,217 @@ def fnmatchcase(name, pat):
     its arguments.
     """
 
-    regex, num_groups = cached_translate(pat)
-    match = regex.match(name)
-    if not match:
-        return False
-    pattern_matched = True
-    for (num, (min_num, max_num)) in zip(match.groups(), num_groups):
-        if num[0] == '0' or not (min_num <= int(num) <= max_num):
-            pattern_matched = False
-            break
-    return pattern_matched
+    return cached_translate(pat).match(name) is not None
+
+
+def compile_matcher(pat):
+    """Return a function testing whether a normalized FILENAME matches
+    PATTERN, including case. See fnmatchcase() and normalize().
+    """
+
+    regex = cached_translate(pat)
+    return lambda name: regex.match(name) is not None
+
+
+# Python < 3.5 does not support more than 100 groups in a regex
+MULTI_MATCHER_MAX_GROUPS = 90
+
+
+def compile_multi_matcher(pats):
+    """Return a function returning the indexes of the PATTERNS which a
+    normalized FILENAME matches, including case, in increasing order.
+
+    Patterns are combined into a single regex where each of them is an
+    optional lookahead followed by an empty group, which participates in the
+    match only if the pattern matches. Patterns translated into regexes with
+    groups of their own, e.g. from brackets containing a slash, are matched
+    on their own.
+    """
+
+    parts = []
+    part_indexes = []
+    separate_matchers = []
+    for index, pat in enumerate(pats):
+        regex = cached_translate(pat)
+        if regex.groups:
+            separate_matchers.append((index, compile_matcher(pat)))
+        else:
+            parts.append(r'(?:(?=%s)())?' % regex.pattern[len('(?s)'):])
+            part_indexes.append(index)
+
+    combined_regexes = []
+    for start in range(0, len(parts), MULTI_MATCHER_MAX_GROUPS):
+        combined_regexes.append((
+            re.compile(''.join(parts[start:start + MULTI_MATCHER_MAX_GROUPS]),
+                       re.S),
+            part_indexes[start:start + MULTI_MATCHER_MAX_GROUPS]))
+
+    def matcher(name):
+        indexes = []
+        for regex, group_indexes in combined_regexes:
+            groups = regex.match(name).groups()
+            indexes.extend(index for index, group
+                           in zip(group_indexes, groups) if group is not None)
+        if separate_matchers:
+            indexes.extend(index for index, separate_matcher
+                           in separate_matchers if separate_matcher(name))
+            indexes.sort()
+        return indexes
+
+    return matcher
+
+
+def _find_brace_ends(pat):
+    """Return the tables of the indexes where the content of a brace
+    starting at each index of PATTERN ends, that is the first comma or
+    closing brace which is not escaped, or the length of PATTERN if none.
+    The first table is for a content whose first character is not escaped,
+    the second one for a content whose first character is.
+
+    Building them once keeps translate() linear, rather than scanning the
+    rest of the pattern for every opening brace.
+    """
+
+    length = len(pat)
+    ends = [length] * (length + 1)
+    escaped_ends = [length] * (length + 1)
+    for pos in range(length - 1, -1, -1):
+        char = pat[pos]
+        if char == ',' or char == '}':
+            ends[pos] = pos
+        elif char == '\\':
+            ends[pos] = escaped_ends[pos + 1]
+        else:
+            ends[pos] = ends[pos + 1]
+        escaped_ends[pos] = ends[pos + 1]
+    return ends, escaped_ends
+
+
+def _translate_numeric_range(min_num, max_num):
+    """Translate the numeric range {MIN..MAX} to a regular expression.
+
+    It matches the integers from MIN to MAX without leading zeros, except
+    after a sign, and without 0 itself unless it is signed.
+    """
+
+    alternatives = []
+    if max(min_num, 1) <= max_num:
+        alternatives.append(_translate_digits_range(max(min_num, 1), max_num))
+    if max(min_num, 0) <= max_num:
+        alternatives.append(r'\+0*(?:%s)' % _translate_digits_range(
+            max(min_num, 0), max_num))
+    if min_num <= min(max_num, 0):
+        alternatives.append(r'-0*(?:%s)' % _translate_digits_range(
+            max(-max_num, 0), -min_num))
+    if not alternatives:
+        return '(?!)'
+    return '(?:%s)' % '|'.join(alternatives)
+
+
+def _translate_digits_range(min_num, max_num):
+    """Translate the range of non-negative integers from MIN to MAX to a
+    regular expression matching their digits."""
+
+    low, high = str(min_num), str(max_num)
+    if len(low) == len(high):
+        return _translate_digits_range_of_length(low, high)
+
+    alternatives = [_translate_digits_range_of_length(low, '9' * len(low))]
+    if len(high) - len(low) == 2:
+        alternatives.append('[1-9]' + _any_digits(len(low)))
+    elif len(high) - len(low) > 2:
+        alternatives.append(r'[1-9]\d{%d,%d}' % (len(low), len(high) - 2))
+    alternatives.append(_translate_digits_range_of_length(
+        '1' + '0' * (len(high) - 1), high))
+    return '|'.join(alternatives)
+
+
+def _translate_digits_range_of_length(low, high):
+    """Translate the range of integers from LOW to HIGH, which are strings
+    of the same number of digits, to a regular expression.
+
+    Digits are factored out, so that the regular expression is linear in
+    the number of digits.
+    """
+
+    prefix_length = 0
+    while prefix_length < len(low) and low[prefix_length] == high[prefix_length]:
+        prefix_length += 1
+    prefix = low[:prefix_length]
+    low, high = low[prefix_length:], high[prefix_length:]
+    if not low:
+        return prefix
+
+    num_digits = len(low) - 1
+    alternatives = []
+    first, last = low[0], high[0]
+    if low[1:] != '0' * num_digits:
+        alternatives.append('%s(?:%s)' % (low[0], _translate_digits_from(low[1:])))
+        first = chr(ord(first) + 1)
+    if high[1:] != '9' * num_digits:
+        last = chr(ord(last) - 1)
+    if first <= last:
+        alternatives.append(
+            _digit_class(first, last) + _any_digits(num_digits))
+    if high[1:] != '9' * num_digits:
+        alternatives.append('%s(?:%s)' % (high[0], _translate_digits_to(high[1:])))
+    return '%s(?:%s)' % (prefix, '|'.join(alternatives))
+
+
+def _translate_digits_from(low):
+    """Translate the range from LOW to as many nines to a regular
+    expression."""
+
+    regex = _any_digits(0)
+    for pos in range(len(low) - 1, -1, -1):
+        num_digits = len(low) - pos - 1
+        digit = low[pos]
+        if regex == _any_digits(num_digits):
+            regex = (_any_digits(num_digits + 1) if digit == '0'
+                     else _digit_class(digit, '9') + regex)
+        elif digit == '9':
+            regex = '9(?:%s)' % regex
+        else:
+            regex = '%s(?:%s)|%s%s' % (
+                digit, regex, _digit_class(chr(ord(digit) + 1), '9'),
+                _any_digits(num_digits))
+    return regex
+
+
+def _translate_digits_to(high):
+    """Translate the range from as many zeros to HIGH to a regular
+    expression."""
+
+    regex = _any_digits(0)
+    for pos in range(len(high) - 1, -1, -1):
+        num_digits = len(high) - pos - 1
+        digit = high[pos]
+        if regex == _any_digits(num_digits):
+            regex = (_any_digits(num_digits + 1) if digit == '9'
+                     else _digit_class('0', digit) + regex)
+        elif digit == '0':
+            regex = '0(?:%s)' % regex
+        else:
+            regex = '%s%s|%s(?:%s)' % (
+                _digit_class('0', chr(ord(digit) - 1)),
+                _any_digits(num_digits), digit, regex)
+    return regex
+
+
+def _digit_class(first, last):
+    if first == last:
+        return first
+    if first == '0' and last == '9':
+        return r'\d'
+    return '[%s-%s]' % (first, last)
+
+
+def _any_digits(num_digits):
+    if num_digits == 0:
+        return ''
+    if num_digits == 1:
+        return r'\d'
+    return r'\d{%d}' % num_digits
 
 
 def translate(pat, nested=False):
@@ -120,25 +350,25 @@ def translate(pat, nested=False):
     index, length = 0, len(pat)  # Current index and length of pattern
     brace_level = 0
     in_brackets = False
-    result = ''
+    result = []
     is_escaped = False
     matching_braces = (len(LEFT_BRACE.findall(pat)) ==
                        len(RIGHT_BRACE.findall(pat)))
-    numeric_groups = []
+    brace_ends = None
     while index < length:
         current_char = pat[index]
         index += 1
         if current_char == '*':
             pos = index
             if pos < length and pat[pos] == '*':
-                result += '.*'
+                result.append('.*')
             else:
-                result += '[^/]*'
+                result.append('[^/]*')
         elif current_char == '?':
-            result += '.'
+            result.append('.')
         elif current_char == '[':
             if in_brackets:
-                result += '\\['
+                result.append('\\[')
             else:
                 pos = index
                 has_slash = False
@@ -148,73 +378,70 @@ def translate(pat, nested=False):
                         break
                     pos += 1
                 if has_slash:
-                    result += '\\[' + pat[index:(pos + 1)] + '\\]'
+                    result.append('\\[' + pat[index:(pos + 1)] + '\\]')
                     index = pos + 2
                 else:
                     if index < length and pat[index] in '!^':
                         index += 1
-                        result += '[^'
+                        result.append('[^')
                     else:
-                        result += '['
+                        result.append('[')
                     in_brackets = True
         elif current_char == '-':
             if in_brackets:
-                result += current_char
+                result.append(current_char)
             else:
-                result += '\\' + current_char
+                result.append('\\' + current_char)
         elif current_char == ']':
-            result += current_char
+            result.append(current_char)
             in_brackets = False
         elif current_char == '{':
-            pos = index
-            has_comma = False
-            while pos < length and (pat[pos] != '}' or is_escaped):
-                if pat[pos] == ',' and not is_escaped:
-                    has_comma = True
-                    break
-                is_escaped = pat[pos] == '\\' and not is_escaped
-                pos += 1
+            if brace_ends is None:
+                brace_ends = _find_brace_ends(pat)
+            pos = brace_ends[is_escaped][index]
+            has_comma = pos < length and pat[pos] == ','
             if not has_comma and pos < length:
                 num_range = NUMERIC_RANGE.match(pat[index:pos])
                 if num_range:
-                    numeric_groups.append(map(int, num_range.groups()))
-                    result += r"([+-]?\d+)"
+                    min_num, max_num = map(int, num_range.groups())
+                    result.append(_translate_numeric_range(min_num, max_num))
                 else:
-                    inner_result, inner_groups = translate(pat[index:pos],
-                                                           nested=True)
-                    result += '\\{%s\\}' % (inner_result,)
-                    numeric_groups += inner_groups
+                    # the content has no closing brace, so the nested
+                    # translation cannot nest further but for backslashes
+                    inner_result = translate(pat[index:pos], nested=True)
+                    result.append('\\{%s\\}' % (inner_result,))
                 index = pos + 1
             elif matching_braces:
-                result += '(?:'
+                result.append('(?:')
                 brace_level += 1
             else:
-                result += '\\{'
+                result.append('\\{')
         elif current_char == ',':
             if brace_level > 0 and not is_escaped:
-                result += '|'
+                result.append('|')
             else:
-                result += '\\,'
+                result.append('\\,')
         elif current_char == '}':
             if brace_level > 0 and not is_escaped:
-                result += ')'
+                result.append(')')
                 brace_level -= 1
             else:
-                result += '\\}'
+                result.append('\\}')
         elif current_char == '/':
             if pat[index:(index + 3)] == "**/":
-                result += "(?:/|/.*/)"
+                result.append("(?:/|/.*/)")
                 index += 3
             else:
-                result += '/'
+                result.append('/')
         elif current_char != '\\':
-            result += re.escape(current_char)
+            result.append(re.escape(current_char))
         if current_char == '\\':
             if is_escaped:
-                result += re.escape(current_char)
+                result.append(re.escape(current_char))
             is_escaped = not is_escaped
         else:
             is_escaped = False
+    result = ''.join(result)
     if not nested:
         result = r'(?s)%s\Z' % result
-    return result, numeric_groups
+    return result
@@ -1,34 +1,42 @@
 """EditorConfig file handler
 
 Provides ``EditorConfigHandler`` class for locating and parsing
-EditorConfig files relevant to a given filepath.
+EditorConfig files relevant to a given filepath, and
+``EditorConfigBatchHandler`` class doing so for many filepaths at once.
 
 Licensed under Simplified BSD License (see LICENSE.BSD file).
 
 """
 
 import os
+from collections import OrderedDict
 
 from editorconfig import VERSION
-from editorconfig.exceptions import PathError, VersionError
+from editorconfig.exceptions import EditorConfigError, PathError, VersionError
 from editorconfig.ini import EditorConfigParser
 
 
-__all__ = ['EditorConfigHandler']
+__all__ = ['EditorConfigHandler', 'EditorConfigBatchHandler']
 
 
-def get_filenames(path, filename):
-    """Yield full filepath for filename in each directory in and above path"""
+def get_filenames(path, filename, boundaries=()):
+    """Yield full filepath for filename in each directory in and above path,
+    up to the first of boundaries or the root"""
+    boundaries = set(normalize_dirname(boundary) for boundary in boundaries)
     path_list = []
     while True:
         path_list.append(os.path.join(path, filename))
         newpath = os.path.dirname(path)
-        if path == newpath:
+        if path == newpath or normalize_dirname(path) in boundaries:
             break
         path = newpath
     return path_list
 
 
+def normalize_dirname(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
 class EditorConfigHandler(object):
 
     """
@@ -41,18 +49,29 @@ class EditorConfigHandler(object):
     """
 
     def __init__(self, filepath, conf_filename='.editorconfig',
-                 version=VERSION):
-        """Create EditorConfigHandler for matching given filepath"""
+                 version=VERSION, boundaries=(), user_conf=None):
+        """Create EditorConfigHandler for matching given filepath
+
+        EditorConfig files are looked for up to the first directory of
+        ``boundaries`` which contains filepath. If the lookup stops there,
+        the ``user_conf`` file is read after them, if given.
+        """
         self.filepath = filepath
         self.conf_filename = conf_filename
         self.version = version
+        self.boundaries = boundaries
+        self.user_conf = user_conf
         self.options = None
 
-    def get_configurations(self):
+    def get_configurations(self, keys=None):
 
         """
         Find EditorConfig files and return all options matching filepath
 
+        If ``keys`` is given, only these options are returned and files are
+        no longer looked for once they are all determined by the files found
+        so far, since options of nearer files take precedence.
+
         Special exceptions that may be raised by this function include:
 
         - ``VersionError``: self.version is invalid EditorConfig version
@@ -62,13 +81,36 @@ class EditorConfigHandler(object):
         """
 
         self.check_assertions()
+        return self.read_configurations(self.get_conf_files(), keys)
+
+    def get_conf_files(self):
+
+        """Return the EditorConfig files which may apply to filepath, the
+        nearest first"""
+
         path, filename = os.path.split(self.filepath)
-        conf_files = get_filenames(path, self.conf_filename)
+        conf_files = get_filenames(path, self.conf_filename, self.boundaries)
+        last_dirname = os.path.dirname(conf_files[-1])
+        if (self.user_conf and self.user_conf not in conf_files and
+                os.path.dirname(last_dirname) != last_dirname):
+            # the lookup has stopped at a boundary
+            conf_files.append(self.user_conf)
+        return conf_files
+
+    def read_configurations(self, conf_files, keys=None, config_files=None):
+
+        """
+        Parse the given EditorConfig files and return all options matching
+        filepath, see ``get_configurations``
+
+        ``config_files`` is passed to ``EditorConfigParser.read``.
+
+        """
 
         # Attempt to find and parse every EditorConfig file in filetree
         for filename in conf_files:
             parser = EditorConfigParser(self.filepath)
-            parser.read(filename)
+            parser.read(filename, config_files)
 
             # Merge new EditorConfig file's options into current options
             old_options = self.options
@@ -80,9 +122,33 @@ class EditorConfigHandler(object):
             if parser.root_file:
                 break
 
+            # Stop parsing if farther files cannot change the wanted options
+            if keys is not None and self.are_keys_determined(keys):
+                break
+
         self.preprocess_values()
+        if keys is not None:
+            self.options = OrderedDict(
+                (key, value) for key, value in self.options.items()
+                if key in keys)
         return self.options
 
+    def are_keys_determined(self, keys):
+
+        """Return True if the given options cannot be changed by files which
+        have not been parsed yet"""
+
+        opts = self.options
+        if opts is None or any(key not in opts for key in keys):
+            return False
+
+        # indent_size "tab" is replaced with tab_width of any file
+        if ("indent_size" in keys and opts["indent_size"].lower() == "tab" and
+                "tab_width" not in opts):
+            return False
+
+        return True
+
     def check_assertions(self):
 
         """Raise error if filepath or version have invalid values"""
@@ -125,3 +191,66 @@ class EditorConfigHandler(object):
         if ("indent_size" in opts and "tab_width" in opts and
                 opts["indent_size"] == "tab"):
             opts["indent_size"] = opts["tab_width"]
+
+
+class EditorConfigBatchHandler(object):
+
+    """
+    Allows locating and parsing of EditorConfig files for many filenames
+
+    Filepaths are grouped by directory: the EditorConfig files which may
+    apply are located once per directory, and each of them is looked up
+    once for the whole batch, rather than once per filepath.
+
+    """
+
+    def __init__(self, filepaths, conf_filename='.editorconfig',
+                 version=VERSION, boundaries=(), user_conf=None):
+        """Create EditorConfigBatchHandler for matching given filepaths, see
+        ``EditorConfigHandler`` for the other arguments"""
+        self.filepaths = filepaths
+        self.conf_filename = conf_filename
+        self.version = version
+        self.boundaries = boundaries
+        self.user_conf = user_conf
+
+    def get_configurations(self, keys=None, errors=None):
+
+        """
+        Return an OrderedDict of the options of each filepath, in order
+
+        See ``EditorConfigHandler.get_configurations`` for ``keys`` and the
+        exceptions which may be raised. If ``errors`` is a dict, the
+        exception of a filepath is stored there instead, and the filepath
+        is left out of the result.
+
+        """
+
+        filepaths_by_dir = OrderedDict()
+        for filepath in self.filepaths:
+            filepaths_by_dir.setdefault(
+                os.path.dirname(filepath), []).append(filepath)
+
+        # parsed EditorConfig files of the batch, by filename
+        config_files = {}
+        configurations = {}
+        for filepaths in filepaths_by_dir.values():
+            conf_files = None
+            for filepath in filepaths:
+                handler = EditorConfigHandler(
+                    filepath, self.conf_filename, self.version,
+                    self.boundaries, self.user_conf)
+                try:
+                    handler.check_assertions()
+                    if conf_files is None:
+                        conf_files = handler.get_conf_files()
+                    configurations[filepath] = handler.read_configurations(
+                        conf_files, keys, config_files)
+                except EditorConfigError as e:
+                    if errors is None:
+                        raise
+                    errors[filepath] = e
+
+        return OrderedDict(
+            (filepath, configurations[filepath])
+            for filepath in self.filepaths if filepath in configurations)
@@ -10,6 +10,9 @@ Changes to original ConfigParser:
 - Octothorpe can be used for comments (not just at beginning of line)
 - Only track INI options in sections that match target filename
 - Stop parsing files with when ``root = true`` is found
+- Files are parsed once into a ``ConfigFile``, a table of sections with a
+  precompiled matcher for all of them which does not depend on the target
+  filename and is kept in a process-wide cache
 
 """
 
@@ -20,12 +23,152 @@ from collections import OrderedDict
 from os import sep
 from os.path import dirname, normpath
 
+from editorconfig.cache import FileCache
 from editorconfig.compat import u
 from editorconfig.exceptions import ParsingError
-from editorconfig.fnmatch import fnmatch
+from editorconfig.fnmatch import compile_multi_matcher, fnmatch, normalize
 
 
-__all__ = ["ParsingError", "EditorConfigParser"]
+__all__ = ["ParsingError", "EditorConfigParser", "ConfigFile", "Section"]
+
+
+def section_pattern(config_filename, glob):
+    """Return the pattern full paths are matched against for a section glob
+    of the given EditorConfig file"""
+    config_dirname = normpath(dirname(config_filename)).replace(sep, '/')
+    glob = glob.replace("\\#", "#")
+    glob = glob.replace("\\;", ";")
+    if '/' in glob:
+        if glob.find('/') == 0:
+            glob = glob[1:]
+        glob = posixpath.join(config_dirname, glob)
+    else:
+        glob = posixpath.join('**/', glob)
+    return glob
+
+
+class Section(object):
+
+    """A section of an EditorConfig file"""
+
+    def __init__(self, config_filename, glob):
+        self.glob = glob
+        self.pattern = section_pattern(config_filename, glob)
+        self.options = OrderedDict()
+
+
+class ConfigFile(object):
+
+    """Parsed EditorConfig file, which does not depend on the filename the
+    options are looked up for"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.root_file = False
+        self.sections = []
+        # (lineno, line) of the lines which could not be parsed
+        self.errors = []
+        # returns the indexes of the sections a normalized path matches
+        self.matcher = None
+
+    def compile(self):
+        """Precompile the patterns of all sections into ``matcher``"""
+        self.matcher = compile_multi_matcher(
+            [section.pattern for section in self.sections])
+
+    def get_options(self, filepath):
+        """Return the options of the sections matching the full filepath,
+        later sections taking precedence"""
+        if self.matcher is None:
+            self.compile()
+        options = OrderedDict()
+        for index in self.matcher(normalize(filepath)):
+            options.update(self.sections[index].options)
+        return options
+
+    def check_errors(self):
+        """Raise ``ParsingError`` which contains a list of all bogus lines if
+        any parsing errors occurred"""
+        if self.errors:
+            e = ParsingError(self.filename)
+            for lineno, line in self.errors:
+                e.append(lineno, line)
+            raise e
+
+
+def parse_config_file(fp, fpname):
+    """Parse a sectioned setup file into a ``ConfigFile``.
+
+    The sections in setup file contains a title line at the top,
+    indicated by a name in square brackets (`[]'), plus key/value
+    options lines, indicated by `name: value' format lines.
+    Continuations are represented by an embedded newline then
+    leading whitespace.  Blank lines, lines beginning with a '#',
+    and just about everything else are ignored.
+    """
+    config_file = ConfigFile(fpname)
+    section = None
+    lineno = 0
+    while True:
+        line = fp.readline()
+        if not line:
+            break
+        if lineno == 0 and line.startswith(u('\ufeff')):
+            line = line[1:]  # Strip UTF-8 BOM
+        lineno = lineno + 1
+        # comment or blank line?
+        if line.strip() == '' or line[0] in '#;':
+            continue
+        # a section header or option header?
+        else:
+            # is it a section header?
+            mo = EditorConfigParser.SECTCRE.match(line)
+            if mo:
+                section = Section(fpname, mo.group('header'))
+                config_file.sections.append(section)
+            # an option line?
+            else:
+                mo = EditorConfigParser.OPTCRE.match(line)
+                if mo:
+                    optname, vi, optval = mo.group('option', 'vi', 'value')
+                    if ';' in optval or '#' in optval:
+                        # ';' and '#' are comment delimiters only if
+                        # preceeded by a spacing character
+                        m = re.search('(.*?) [;#]', optval)
+                        if m:
+                            optval = m.group(1)
+                    optval = optval.strip()
+                    # allow empty values
+                    if optval == '""':
+                        optval = ''
+                    optname = optname.rstrip().lower()
+                    if section is None:
+                        if optname == 'root':
+                            config_file.root_file = (optval.lower() == 'true')
+                    else:
+                        section.options[optname] = optval
+                else:
+                    # a non-fatal parsing error occurred.  keep going, the
+                    # errors are reported when the options are looked up
+                    config_file.errors.append((lineno, repr(line)))
+    config_file.compile()
+    return config_file
+
+
+def load_config_file(filename):
+    """Read and parse an EditorConfig file, None if it cannot be opened"""
+    try:
+        fp = open(filename, encoding='utf-8')
+    except IOError:
+        return None
+    try:
+        return parse_config_file(fp, filename)
+    finally:
+        fp.close()
+
+
+# parsed EditorConfig files of the whole process
+config_file_cache = FileCache(load_config_file)
 
 
 class EditorConfigParser(object):
@@ -83,92 +226,35 @@ class EditorConfigParser(object):
 
     def matches_filename(self, config_filename, glob):
         """Return True if section glob matches filename"""
-        config_dirname = normpath(dirname(config_filename)).replace(sep, '/')
-        glob = glob.replace("\\#", "#")
-        glob = glob.replace("\\;", ";")
-        if '/' in glob:
-            if glob.find('/') == 0:
-                glob = glob[1:]
-            glob = posixpath.join(config_dirname, glob)
+        return fnmatch(self.filename, section_pattern(config_filename, glob))
+
+    def read(self, filename, config_files=None):
+        """Read and parse single EditorConfig file
+
+        ``config_files`` is a dict of the files read so far, e.g. by a batch
+        of lookups, which are then used without checking them again.
+        """
+        if config_files is None:
+            config_file = config_file_cache.get(filename)
+        elif filename in config_files:
+            config_file = config_files[filename]
         else:
-            glob = posixpath.join('**/', glob)
-        return fnmatch(self.filename, glob)
-
-    def read(self, filename):
-        """Read and parse single EditorConfig file"""
-        try:
-            fp = open(filename, encoding='utf-8')
-        except IOError:
+            config_file = config_files[filename] = config_file_cache.get(
+                filename)
+        if config_file is None:
             return
-        self._read(fp, filename)
-        fp.close()
+        self._apply(config_file)
 
     def _read(self, fp, fpname):
-        """Parse a sectioned setup file.
-
-        The sections in setup file contains a title line at the top,
-        indicated by a name in square brackets (`[]'), plus key/value
-        options lines, indicated by `name: value' format lines.
-        Continuations are represented by an embedded newline then
-        leading whitespace.  Blank lines, lines beginning with a '#',
-        and just about everything else are ignored.
-        """
-        in_section = False
-        matching_section = False
-        optname = None
-        lineno = 0
-        e = None                                  # None, or an exception
-        while True:
-            line = fp.readline()
-            if not line:
-                break
-            if lineno == 0 and line.startswith(u('\ufeff')):
-                line = line[1:]  # Strip UTF-8 BOM
-            lineno = lineno + 1
-            # comment or blank line?
-            if line.strip() == '' or line[0] in '#;':
-                continue
-            # a section header or option header?
-            else:
-                # is it a section header?
-                mo = self.SECTCRE.match(line)
-                if mo:
-                    sectname = mo.group('header')
-                    in_section = True
-                    matching_section = self.matches_filename(fpname, sectname)
-                    # So sections can't start with a continuation line
-                    optname = None
-                # an option line?
-                else:
-                    mo = self.OPTCRE.match(line)
-                    if mo:
-                        optname, vi, optval = mo.group('option', 'vi', 'value')
-                        if ';' in optval or '#' in optval:
-                            # ';' and '#' are comment delimiters only if
-                            # preceeded by a spacing character
-                            m = re.search('(.*?) [;#]', optval)
-                            if m:
-                                optval = m.group(1)
-                        optval = optval.strip()
-                        # allow empty values
-                        if optval == '""':
-                            optval = ''
-                        optname = self.optionxform(optname.rstrip())
-                        if not in_section and optname == 'root':
-                            self.root_file = (optval.lower() == 'true')
-                        if matching_section:
-                            self.options[optname] = optval
-                    else:
-                        # a non-fatal parsing error occurred.  set up the
-                        # exception but keep going. the exception will be
-                        # raised at the end of the file and will contain a
-                        # list of all bogus lines
-                        if not e:
-                            e = ParsingError(fpname)
-                        e.append(lineno, repr(line))
-        # if any parsing errors occurred, raise an exception
-        if e:
-            raise e
+        """Parse a sectioned setup file, see ``parse_config_file``"""
+        self._apply(parse_config_file(fp, fpname))
+
+    def _apply(self, config_file):
+        """Track the options of the sections of a parsed file which match
+        the filename"""
+        self.root_file = config_file.root_file
+        self.options.update(config_file.get_options(self.filename))
+        config_file.check_errors()
 
     def optionxform(self, optionstr):
         return optionstr.lower()
@@ -0,0 +1,98 @@
+import sublime
+from typing import Dict, Optional, Tuple  # noqa: F401
+from .functions import is_event_listener_enabled, set_indentation_for_view
+
+# whether a view has only invisible chars is only checked if it is not larger than this
+# or if it has shrunk to less than this ratio of its previous size
+INVISIBLE_CHARS_CHECK_MAX_SIZE = 4096
+INVISIBLE_CHARS_CHECK_SHRINK_RATIO = 0.5
+
+# a modification is a bulk change if it changes the size by at least this many chars
+# and by at least this ratio of the larger size, e.g. replacing all or reloading the file
+BULK_CHANGE_MIN_CHARS = 4096
+BULK_CHANGE_MIN_RATIO = 0.5
+
+# the delay (in milliseconds) without further modifications before re-detecting after a bulk change
+BULK_CHANGE_REDETECTION_DELAY = 500
+
+# buffer ID => (change count, size) when it was last modified
+_buffer_states = {}  # type: Dict[int, Tuple[int, int]]
+
+
+def track_buffer_size(view: sublime.View) -> None:
+    """
+    @brief Record the size of the buffer of the view as a baseline for its first modification.
+           A buffer which is tracked already is left as is.
+
+    @param view The view
+    """
+
+    buffer_id = view.buffer_id()
+
+    if buffer_id not in _buffer_states:
+        _buffer_states[buffer_id] = (view.change_count(), view.size())
+
+
+def track_modification(view: sublime.View) -> Optional[Tuple[int, int]]:
+    """
+    @brief Record the size of the modified buffer of the view.
+
+    @param view The view
+
+    @return (size before the modification, size after it) or None if the modification has been tracked already,
+            e.g., through a clone of the view.
+    """
+
+    buffer_id = view.buffer_id()
+    change_count = view.change_count()
+    size = view.size()
+
+    state = _buffer_states.get(buffer_id)
+
+    if state and state[0] == change_count:
+        return None
+
+    _buffer_states[buffer_id] = (change_count, size)
+
+    # the baseline is unknown, e.g., the view has been neither loaded nor activated since the plugin was loaded
+    return (state[1] if state else size, size)
+
+
+def may_have_only_invisible_chars(previous_size: int, size: int) -> bool:
+    return size <= INVISIBLE_CHARS_CHECK_MAX_SIZE or size < previous_size * INVISIBLE_CHARS_CHECK_SHRINK_RATIO
+
+
+def is_bulk_change(previous_size: int, size: int) -> bool:
+    size_change = abs(size - previous_size)
+
+    return size_change >= BULK_CHANGE_MIN_CHARS and size_change >= max(size, previous_size) * BULK_CHANGE_MIN_RATIO
+
+
+def schedule_redetection(view: sublime.View) -> None:
+    """
+    @brief Set the indentation for the view again if it is not modified any further for a while.
+
+    @param view The view
+    """
+
+    change_count = view.change_count()
+
+    def redetect() -> None:
+        if (
+            view.is_valid()
+            and view.change_count() == change_count
+            and is_event_listener_enabled("on_bulk_change", False)
+        ):
+            set_indentation_for_view(view)
+
+    sublime.set_timeout_async(redetect, BULK_CHANGE_REDETECTION_DELAY)
+
+
+def drop_modification_state_for_buffer(buffer_id: int) -> None:
+    """
+    @brief Forget the tracked modifications of the buffer.
+
+    @param buffer_id The buffer ID
+    """
+
+    _buffer_states.pop(buffer_id, None)
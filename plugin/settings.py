@@ -1,5 +1,37 @@
 import sublime
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+
+# the keys of the plugin settings, see AutoSetIndentation.sublime-settings
+SETTINGS_KEYS = (
+    "event_listeners",
+    "default_indentation",
+    "hijack_st_detect_indentation",
+    "sample_windows",
+    "guessing_confidence",
+    "incremental_detection",
+    "editorconfig_lookup_boundary",
+    "editorconfig_user_config",
+    "editorconfig_pattern_cache_size",
+    "editorconfig_prewarm",
+    "editorconfig_prewarm_max_files",
+    "show_status_message",
+)
+
+
+class SettingsSnapshot:
+    """ The plugin settings as plain attributes, so that reading them does not go through the settings API. """
+
+    def __init__(self) -> None:
+        self.is_loaded = False
+
+    def refresh(self) -> None:
+        settings = get_settings_object()
+
+        self.__dict__.update({key: settings.get(key) for key in SETTINGS_KEYS})
+        self.is_loaded = True
+
+
+_snapshot = SettingsSnapshot()
 
 
 def get_package_name() -> str:
@@ -54,4 +86,33 @@ def get_setting(key: str, default: Optional[Any] = None) -> Any:
     @return The setting's value.
     """
 
-    return get_settings_object().get(key, default)
+    if key not in SETTINGS_KEYS:
+        return get_settings_object().get(key, default)
+
+    if not _snapshot.is_loaded:
+        _snapshot.refresh()
+
+    value = getattr(_snapshot, key)
+
+    return default if value is None else value
+
+
+def watch_settings(on_change: Optional[Callable[[], None]] = None) -> None:
+    """
+    @brief Keep the snapshot of the plugin settings up-to-date.
+
+    @param on_change The callback called after the snapshot is refreshed due to a change
+    """
+
+    def refresh() -> None:
+        _snapshot.refresh()
+
+        if on_change:
+            on_change()
+
+    get_settings_object().add_on_change(get_package_name(), refresh)
+    _snapshot.refresh()
+
+
+def unwatch_settings() -> None:
+    get_settings_object().clear_on_change(get_package_name())
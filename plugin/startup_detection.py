@@ -0,0 +1,119 @@
+import sublime
+import time
+from typing import List, Optional, Set  # noqa: F401
+from .functions import is_event_listener_enabled, set_indentation_for_view
+from .log import print_msg
+from .utils import is_view_normal_ready
+
+# the max number of views and the max time (in seconds) spent on them per tick
+SWEEP_VIEWS_PER_TICK = 8
+SWEEP_TIME_PER_TICK = 0.02
+
+_sweep = None  # type: Optional[StartupSweep]
+
+
+class StartupSweep:
+    """ Sets the indentation for views which are open on starting, a few of them per tick in the async thread. """
+
+    def __init__(self, views: List[sublime.View]) -> None:
+        self.views = views
+        self.index = 0
+        self.num_processed = 0
+        self.is_cancelled = False
+        self.start_time = 0.0
+
+    def start(self) -> None:
+        self.start_time = time.perf_counter()
+
+        sublime.set_timeout_async(self.tick, 0)
+
+    def cancel(self) -> None:
+        self.is_cancelled = True
+
+    def tick(self) -> None:
+        """
+        @brief Set the indentation for the next few views and schedule the next tick.
+               Detections are queued in the async thread before the next tick, so they are not held up.
+        """
+
+        if self.is_cancelled:
+            return
+
+        deadline = time.perf_counter() + SWEEP_TIME_PER_TICK
+        tick_end = min(self.index + SWEEP_VIEWS_PER_TICK, len(self.views))
+
+        while self.index < tick_end and time.perf_counter() < deadline:
+            view = self.views[self.index]
+            self.index += 1
+
+            # views which are still loading are handled by "on_load_async"
+            if view.is_valid() and is_view_normal_ready(view):
+                set_indentation_for_view(view)
+                self.num_processed += 1
+
+        # the summary is queued after the detections of the last tick
+        sublime.set_timeout_async(self.tick if self.index < len(self.views) else self.finish, 0)
+
+    def finish(self) -> None:
+        if self.is_cancelled:
+            return
+
+        print_msg(
+            "Startup detection: {} of {} views processed in {:.3f}s".format(
+                self.num_processed, len(self.views), time.perf_counter() - self.start_time
+            )
+        )
+
+
+def get_views_by_priority() -> List[sublime.View]:
+    """
+    @brief Get the views of all windows: the active views first, then the visible ones, then the others.
+
+    @return The views.
+    """
+
+    windows = sublime.windows()
+    views = []  # type: List[sublime.View]
+    view_ids = set()  # type: Set[int]
+
+    def add_view(view: Optional[sublime.View]) -> None:
+        if view and view.id() not in view_ids:
+            view_ids.add(view.id())
+            views.append(view)
+
+    for window in windows:
+        add_view(window.active_view())
+
+    for window in windows:
+        for group in range(window.num_groups()):
+            add_view(window.active_view_in_group(group))
+
+    for window in windows:
+        for view in window.views():
+            add_view(view)
+
+    return views
+
+
+def start_startup_detection() -> None:
+    """
+    @brief Start setting the indentation for views which are open on starting, in the background.
+    """
+
+    global _sweep
+
+    cancel_startup_detection()
+
+    if not is_event_listener_enabled("on_load_async"):
+        return
+
+    _sweep = StartupSweep(get_views_by_priority())
+    _sweep.start()
+
+
+def cancel_startup_detection() -> None:
+    global _sweep
+
+    if _sweep:
+        _sweep.cancel()
+        _sweep = None
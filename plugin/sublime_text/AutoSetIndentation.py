@@ -1,26 +1,76 @@
+import os
 import sublime
 import sublime_plugin
-from typing import Tuple, Dict, Optional
+from editorconfig.ini import config_file_cache
+from typing import Tuple, Dict, List, Optional
 from ..functions import (
     is_view_at_front,
     is_view_only_invisible_chars,
     is_event_listener_enabled,
     set_indentation_for_view,
 )
+from ..detection_cache import drop_detection_result_for_buffer
+from ..editorconfig_prewarm import cancel_prewarm, prewarm_window
+from ..indent_histogram import drop_histogram_for_buffer, update_histogram_for_buffer
 from ..log import print_msg
+from ..modification_tracker import (
+    drop_modification_state_for_buffer,
+    is_bulk_change,
+    may_have_only_invisible_chars,
+    schedule_redetection,
+    track_buffer_size,
+    track_modification,
+)
 from ..settings import get_setting
 
 
 class AutoSetIndentationEventListener(sublime_plugin.EventListener):
     def on_load_async(self, view: sublime.View) -> None:
+        track_buffer_size(view)
+
         if is_event_listener_enabled("on_load_async"):
             set_indentation_for_view(view)
 
+    def on_activated_async(self, view: sublime.View) -> None:
+        # so that the first modification can be told a bulk change as well
+        track_buffer_size(view)
+
     def on_modified_async(self, view: sublime.View) -> None:
+        sizes = track_modification(view)
+
+        if not sizes:
+            return
+
         # when the view is left only invisible chars (\s),
         # we assume the indentation of this view has not been detected yet
-        if is_view_only_invisible_chars(view):
+        if may_have_only_invisible_chars(*sizes) and is_view_only_invisible_chars(view):
             view.settings().set("ASI_is_indentation_detected", False)
+        elif is_bulk_change(*sizes) and is_event_listener_enabled("on_bulk_change", False):
+            schedule_redetection(view)
+
+    def on_post_save_async(self, view: sublime.View) -> None:
+        # a new .editorconfig may be remembered as missing
+        file_path = view.file_name()
+        if file_path and os.path.basename(file_path) == ".editorconfig":
+            config_file_cache.invalidate(file_path)
+
+    # ST 4 only, a window's folders are known from then on
+    def on_new_window_async(self, window: sublime.Window) -> None:
+        prewarm_window(window)
+
+    # ST 4 only
+    def on_load_project_async(self, window: sublime.Window) -> None:
+        prewarm_window(window)
+
+    # ST 4 only
+    def on_pre_close_window(self, window: sublime.Window) -> None:
+        cancel_prewarm(window.id())
+
+    def on_pre_close(self, view: sublime.View) -> None:
+        if not view.clones():
+            drop_histogram_for_buffer(view.buffer_id())
+            drop_detection_result_for_buffer(view.buffer_id())
+            drop_modification_state_for_buffer(view.buffer_id())
 
     def on_text_command(self, view: sublime.View, command_name: str, args: dict) -> Optional[Tuple[str, Dict]]:
         """
@@ -51,11 +101,35 @@ class AutoSetIndentationEventListener(sublime_plugin.EventListener):
         @param args         The arguments
         """
 
+        # cheapest checks first since this is called for every text command
         if (
-            view.settings().get("ASI_is_indentation_detected", False)
+            (command_name != "paste" and command_name != "paste_and_indent")
             or not is_event_listener_enabled("on_post_paste")
-            or (command_name != "paste" and command_name != "paste_and_indent")
+            or view.settings().get("ASI_is_indentation_detected", False)
         ):
             return
 
         set_indentation_for_view(view)
+
+
+# TextChangeListener is only available since ST 4
+if hasattr(sublime_plugin, "TextChangeListener"):
+
+    class AutoSetIndentationTextChangeListener(sublime_plugin.TextChangeListener):
+        """ Keeps the indentation histogram of the buffer up-to-date with modified lines. """
+
+        @classmethod
+        def is_applicable(cls, buffer: sublime.Buffer) -> bool:
+            return bool(get_setting("incremental_detection"))
+
+        def on_text_changed(self, changes: List[sublime.TextChange]) -> None:
+            if self.buffer:
+                update_histogram_for_buffer(self.buffer, changes)
+
+        def on_reload(self) -> None:
+            if self.buffer:
+                drop_histogram_for_buffer(self.buffer.id())
+
+        def on_revert(self) -> None:
+            if self.buffer:
+                drop_histogram_for_buffer(self.buffer.id())
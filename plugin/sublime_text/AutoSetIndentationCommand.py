@@ -1,16 +1,23 @@
 import collections
 import editorconfig
+import itertools
 import IndentFinder.indent_finder as indentfinder
-import re
 import sublime
 import sublime_plugin
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence, Tuple  # noqa: F401
+from ..detection_cache import get_detection_key, get_detection_result, set_detection_result
+from ..editorconfig_lookup import get_editorconfig_properties, get_editorconfig_state
+from ..indent_histogram import can_use_histogram_for_view, get_histogram_result_for_view
 from ..log import msg, show_status_message
 from ..settings import get_setting
 
 Indentation = collections.namedtuple("Indentation", ["type", "size"])
 INDENTATION_UNKNOWN = Indentation("unknown", -1)
 
+# view ID => the token of its latest detection, whose result is still to be applied
+_pending_detections = {}  # type: Dict[int, int]
+_detection_tokens = itertools.count(1)
+
 
 def get_ASI_result_sources_for_view(view: sublime.View) -> List[str]:
     return view.settings().get("ASI_result_sources", [])  # type: ignore
@@ -42,15 +49,144 @@ class AutoSetIndentationCommand(sublime_plugin.TextCommand):
     def run(self, edit: sublime.Edit, show_message: bool = True, sample_length: int = 2 ** 16) -> None:
         """
         @brief Run the "auto_set_indentation" command.
+               The indentation is detected in the async thread and set later in the main thread.
 
         @param self         The object
         @param edit         The edit
         @param show_message The show message
         """
 
-        reset_ASI_result_sources_for_view(self.view)
+        change_count = self.view.change_count()
+        file_path = self.view.file_name()
+        window = self.view.window()
+        folders = window.folders() if window else []
+
+        token = next(_detection_tokens)
+        _pending_detections[self.view.id()] = token
+
+        sublime.set_timeout_async(
+            lambda: self.detect(token, change_count, file_path, folders, show_message, sample_length), 0
+        )
+
+    def detect(
+        self,
+        token: int,
+        change_count: int,
+        file_path: Optional[str],
+        folders: Sequence[str],
+        show_message: bool,
+        sample_length: int,
+    ) -> None:
+        """
+        @brief Detect the indentation of the view and pass it to the main thread to be applied.
+               The last detection result of the unchanged buffer is reused if possible.
+
+        @param self          The object
+        @param token         The token of the detection
+        @param change_count  The change count of the view when the detection was requested
+        @param file_path     The file path of the view when the detection was requested
+        @param folders       The folders of the window of the view
+        @param show_message  The show message
+        @param sample_length The sample length
+        """
+
+        if self.is_detection_stale(token, change_count, file_path, show_message, sample_length):
+            return
+
+        # the .editorconfig files may have changed, e.g., by switching git branches
+        editorconfig_state = get_editorconfig_state(file_path, folders) if file_path else ()
+        key = get_detection_key(change_count, file_path, folders, sample_length, editorconfig_state)
+        result = get_detection_result(self.view.buffer_id(), key)
+
+        if result:
+            indent, sources = result
+        else:
+            sources = []
+            indent = self.get_indentation_for_view(self.view, sample_length, file_path, folders, sources)
+
+        sublime.set_timeout(
+            lambda: self.apply(token, change_count, file_path, key, indent, sources, show_message, sample_length), 0
+        )
+
+    def is_detection_stale(
+        self, token: int, change_count: int, file_path: Optional[str], show_message: bool, sample_length: int
+    ) -> bool:
+        """
+        @brief Check whether the view has changed or closed since the detection was requested,
+               or another detection has been requested since.
+               The view is detected again if it has changed.
+
+        @param self          The object
+        @param token         The token of the detection
+        @param change_count  The change count of the view when the detection was requested
+        @param file_path     The file path of the view when the detection was requested
+        @param show_message  The show message
+        @param sample_length The sample length
+
+        @return True if the detection is stale, False otherwise.
+        """
+
+        if _pending_detections.get(self.view.id()) != token:
+            return True
+
+        if not self.view.is_valid():
+            _pending_detections.pop(self.view.id(), None)
+            return True
+
+        # e.g., typing before the detection runs, nothing else would detect the view later
+        if self.view.change_count() != change_count or self.view.file_name() != file_path:
+            self.view.run_command(
+                "auto_set_indentation", {"show_message": show_message, "sample_length": sample_length}
+            )
+            return True
+
+        return False
+
+    def apply(
+        self,
+        token: int,
+        change_count: int,
+        file_path: Optional[str],
+        key: Tuple[Any, ...],
+        indent: Indentation,
+        sources: List[str],
+        show_message: bool,
+        sample_length: int,
+    ) -> None:
+        """
+        @brief Set the detected indentation for the view unless the detection is stale.
+
+        @param self          The object
+        @param token         The token of the detection
+        @param change_count  The change count of the view when the detection was requested
+        @param file_path     The file path of the view when the detection was requested
+        @param key           The key which the result is valid for
+        @param indent        The detected indentation
+        @param sources       The sources of the detected indentation
+        @param show_message  The show message
+        @param sample_length The sample length
+        """
+
+        if self.is_detection_stale(token, change_count, file_path, show_message, sample_length):
+            return
+
+        _pending_detections.pop(self.view.id(), None)
+
+        set_detection_result(self.view.buffer_id(), key, indent, sources)
+        self.set_indentation(indent, sources, show_message)
+
+    def set_indentation(self, indent: Indentation, sources: List[str], show_message: bool) -> None:
+        """
+        @brief Set the detected indentation for the view.
 
-        indent = self.get_indentation_for_view(self.view, sample_length)
+        @param self         The object
+        @param indent       The detected indentation
+        @param sources      The sources of the detected indentation
+        @param show_message The show message
+        """
+
+        reset_ASI_result_sources_for_view(self.view)
+        add_ASI_result_sources_for_view(self.view, sources)
 
         # if a special indentation case is met, there is no need to run more codes
         if self.special_indentation_cases(self.view, indent, show_message):
@@ -95,7 +231,14 @@ class AutoSetIndentationCommand(sublime_plugin.TextCommand):
 
         return False
 
-    def get_indentation_for_view(self, view: sublime.View, sample_length: int = 2 ** 16) -> Indentation:
+    def get_indentation_for_view(
+        self,
+        view: sublime.View,
+        sample_length: int,
+        file_path: Optional[str],
+        folders: Sequence[str],
+        sources: List[str],
+    ) -> Indentation:
         """
         @brief Guess the indentation for the view.
                This would first try using configs from the .editorconfig file
@@ -104,14 +247,17 @@ class AutoSetIndentationCommand(sublime_plugin.TextCommand):
         @param self          The object
         @param view          The view
         @param sample_length The sample length
+        @param file_path     The file path of the view
+        @param folders       The folders of the window of the view
+        @param sources       The list which the sources of the indentation are appended to
 
         @return The indentation namedtuple for view.
         """
 
-        indentation_editorconfig = self.get_indentation_from_editorconfig()
+        indentation_editorconfig = self.get_indentation_from_editorconfig(file_path, folders)
 
         if indentation_editorconfig != INDENTATION_UNKNOWN:
-            add_ASI_result_sources_for_view(view, [".editorconfig"])
+            sources.append(".editorconfig")
 
         # .editorconfig provides all needed informations
         if (
@@ -120,37 +266,79 @@ class AutoSetIndentationCommand(sublime_plugin.TextCommand):
         ):
             return indentation_editorconfig
 
-        sample = view.substr(sublime.Region(0, min(len(view), sample_length)))
-        indentation_guessed = self.guess_indentation_from_string(sample)
+        if get_setting("incremental_detection") and can_use_histogram_for_view(view):
+            histogram_result = get_histogram_result_for_view(view, tuple(INDENTATION_UNKNOWN))
+            indentation_guessed = self.get_indentation_from_result(histogram_result)
+        else:
+            samples = self.get_samples_for_view(view, sample_length, max(int(get_setting("sample_windows", 1)), 1))
+            indentation_guessed = self.guess_indentation_from_strings(samples)
 
-        add_ASI_result_sources_for_view(view, ["guessing"])
+        sources.append("guessing")
 
         return merge_indentation_tuples(indentation_editorconfig, indentation_guessed)
 
-    def get_indentation_from_editorconfig(self) -> Indentation:
+    def get_samples_for_view(self, view: sublime.View, sample_length: int = 2 ** 16, windows: int = 1) -> List[str]:
+        """
+        @brief Get samples from the view for guessing the indentation.
+               Samples are windows evenly spread across the view, which are aligned to line boundaries.
+               The first window is always the head and the last window is always the tail.
+
+        @param self          The object
+        @param view          The view
+        @param sample_length The total length of samples
+        @param windows       The number of windows
+
+        @return The samples.
+        """
+
+        view_size = view.size()
+
+        if windows <= 1 or view_size <= sample_length:
+            return [view.substr(sublime.Region(0, min(view_size, sample_length)))]
+
+        window_length = sample_length // windows
+        window_stride = (view_size - window_length) / (windows - 1)
+
+        samples = []  # type: List[str]
+        for i in range(windows):
+            begin = int(i * window_stride)
+            end = begin + window_length
+
+            # windows start from a line beginning and end before a line beginning
+            if begin > 0 and view.line(begin).begin() != begin:
+                begin = view.full_line(begin).end()
+            if end < view_size:
+                end = view.line(end).begin()
+
+            if begin < end:
+                samples.append(view.substr(sublime.Region(begin, end)))
+
+        return samples
+
+    def get_indentation_from_editorconfig(self, file_path: Optional[str], folders: Sequence[str]) -> Indentation:
         """
         @brief Guess the indentation from the .editorconfig file.
 
-        @param self   The object
+        @param self      The object
+        @param file_path The file path of the view
+        @param folders   The folders of the window of the view
 
         @return Indentation namedtuple
         """
 
         indentation = INDENTATION_UNKNOWN._asdict()
 
-        file_path = self.view.file_name()
-
         # is a new buffer so no file path
         if not file_path:
             return INDENTATION_UNKNOWN
 
         try:
-            options = editorconfig.get_properties(file_path)
+            options = get_editorconfig_properties(file_path, folders, ("indent_style", "indent_size"))
         except editorconfig.EditorConfigError:
             return INDENTATION_UNKNOWN
 
-        indent_style = options.get("indent_style")
-        indent_size = options.get("indent_size")
+        indent_style = options.get("indent_style")  # type: Any
+        indent_size = options.get("indent_size")  # type: Any
 
         # sanitize indent_style
         if indent_style != "space" and indent_style != "tab":
@@ -180,38 +368,54 @@ class AutoSetIndentationCommand(sublime_plugin.TextCommand):
         @return Indentation namedtuple
         """
 
-        indentation = INDENTATION_UNKNOWN._asdict()
+        return self.guess_indentation_from_strings([string])
+
+    def guess_indentation_from_strings(self, strings: List[str]) -> Indentation:
+        """
+        @brief Guess the indentation of the given independent strings.
+
+        @param self    The object
+        @param strings The strings
+
+        @return Indentation namedtuple
+        """
 
         indent_finder = indentfinder.IndentFinder(tuple(INDENTATION_UNKNOWN))
-        indent_finder.parse_string(string)
+        indent_finder.parse_segments(strings, get_setting("guessing_confidence"))
 
-        # possible outputs:
-        #   - space X
-        #   - tab Y
-        #   - mixed tab Y space X
-        #   - unknown -1 (the default one from the constructor)
-        finder_result = str(indent_finder)
+        return self.get_indentation_from_finder(indent_finder)
 
-        # unable to determine the indentation
-        if finder_result == "{type} {size}".format_map(INDENTATION_UNKNOWN._asdict()):
-            return INDENTATION_UNKNOWN
+    def get_indentation_from_finder(self, indent_finder: Any) -> Indentation:
+        """
+        @brief Get the indentation from a parsed IndentFinder.
+
+        @param self          The object
+        @param indent_finder The IndentFinder object
 
-        indent_tab_m = re.search(r"\btab\s+(?P<size>[0-9]+)", finder_result)
-        indent_tab = int(indent_tab_m.group("size")) if indent_tab_m else 0
+        @return Indentation namedtuple
+        """
 
-        indent_space_m = re.search(r"\bspace\s+(?P<size>[0-9]+)", finder_result)
-        indent_space = int(indent_space_m.group("size")) if indent_space_m else 0
+        return self.get_indentation_from_result(indent_finder.result())
 
-        # note that for mixed indentation, we assume it's tab-indented
-        if indent_tab > 0:
-            indentation["type"] = "tab"
-            indentation["size"] = indent_tab
+    def get_indentation_from_result(self, result: Any) -> Indentation:
+        """
+        @brief Get the indentation from the result of an IndentFinder.
 
-        if indent_space > 0:
-            indentation["type"] = "space"
-            indentation["size"] = indent_space
+        @param self   The object
+        @param result The IndentResult namedtuple
 
-        return Indentation(**indentation)
+        @return Indentation namedtuple
+        """
+
+        # note that for mixed indentation, the size is the one of its space part
+        if result.type == "mixed":
+            return Indentation("space", result.size)
+
+        if (result.type == "tab" or result.type == "space") and result.size > 0:
+            return Indentation(result.type, result.size)
+
+        # unable to determine the indentation
+        return INDENTATION_UNKNOWN
 
     def use_indentation_default(self, view: sublime.View, show_message: bool = True) -> None:
         """
@@ -0,0 +1,9 @@
+import sublime_plugin
+from ..editorconfig_lookup import print_cache_stats
+
+
+class AutoSetIndentationPrintCacheStatsCommand(sublime_plugin.ApplicationCommand):
+    """ Prints the stats of the plugin's caches to the console. """
+
+    def run(self) -> None:
+        print_cache_stats()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark looking up .editorconfig properties of many files at once against one file after another.
+
+A temporary tree of nested directories is created, with an .editorconfig file in some of them.
+Lookups are measured with the parsed files cache cleared before each run (cold) and kept (warm).
+
+Usage: python3 scripts/bench_editorconfig_batch.py [depth] [files_per_dir]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugin", "libs"))
+
+import editorconfig  # noqa: E402
+from editorconfig.ini import config_file_cache  # noqa: E402
+
+KEYS = ("indent_style", "indent_size")
+
+EDITORCONFIG = """
+[*]
+indent_style = space
+indent_size = 4
+
+[*.{js,ts,json}]
+indent_size = 2
+
+[Makefile]
+indent_style = tab
+
+[lib/**.c]
+indent_size = 8
+"""
+
+
+def make_tree(root, depth, files_per_dir):
+    """
+    @brief Make a tree of 2 sub-directories per directory, down to the depth.
+
+    @return The file paths.
+    """
+
+    file_paths = []
+    dir_paths = [root]
+
+    with open(os.path.join(root, ".editorconfig"), "w") as f:
+        f.write("root = true\n" + EDITORCONFIG)
+
+    for level in range(depth):
+        next_dir_paths = []
+        for dir_path in dir_paths:
+            for name in ("src", "lib"):
+                sub_dir_path = os.path.join(dir_path, name)
+                os.mkdir(sub_dir_path)
+                next_dir_paths.append(sub_dir_path)
+
+                if level % 2:
+                    with open(os.path.join(sub_dir_path, ".editorconfig"), "w") as f:
+                        f.write(EDITORCONFIG)
+
+        dir_paths = next_dir_paths
+
+        for dir_path in dir_paths:
+            for i in range(files_per_dir):
+                file_path = os.path.join(dir_path, "file%d%s" % (i, (".py", ".js", ".c", "")[i % 4]))
+                open(file_path, "w").close()
+                file_paths.append(file_path)
+
+    return file_paths
+
+
+def per_file(file_paths):
+    return [editorconfig.get_properties(file_path, KEYS) for file_path in file_paths]
+
+
+def batch(file_paths):
+    return list(editorconfig.get_properties_batch(file_paths, KEYS).values())
+
+
+def best_time(func, cold, repeat=5):
+    times = []
+    for _ in range(repeat):
+        if cold:
+            config_file_cache.clear()
+        times.append(timeit.timeit(func, number=1))
+
+    return min(times)
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    files_per_dir = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    root = tempfile.mkdtemp()
+    try:
+        file_paths = make_tree(root, depth, files_per_dir)
+        assert per_file(file_paths) == batch(file_paths)
+
+        print("%d files in %d directories" % (len(file_paths), len(set(map(os.path.dirname, file_paths)))))
+        print("%6s %14s %14s %8s" % ("cache", "per file (s)", "batch (s)", "speedup"))
+
+        for cold in (True, False):
+            per_file_time = best_time(lambda: per_file(file_paths), cold)
+            batch_time = best_time(lambda: batch(file_paths), cold)
+
+            print(
+                "%6s %14.4f %14.4f %7.2fx"
+                % ("cold" if cold else "warm", per_file_time, batch_time, per_file_time / batch_time)
+            )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the translation and the matching of .editorconfig section globs.
+
+Adversarial patterns are made longer and more deeply nested at each step.
+Time per unit of size should stay flat for linear behaviour, that is the ratio to the previous step
+should stay close to the growth factor of the size (2). Patterns nested too deeply for the re module
+are compiled to a never matching regex, which is reported as "rejected".
+
+Usage: python3 scripts/bench_editorconfig_glob.py [max_exponent]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugin", "libs"))
+
+from editorconfig.fnmatch import NEVER_MATCHING, cached_translate, get_cache, translate  # noqa: E402
+
+
+def unclosed_braces(size):
+    return "{" * size
+
+
+def escaped_braces(size):
+    return "{\\}" * size + "}"
+
+
+# closing braces are not adjacent since "}}" is counted as a single closing brace
+def nested_alternations(size):
+    return "{a," * size + "b" + "x}" * size
+
+
+def nested_braces(size):
+    return "{a{b,c}" * size + "x}" * size
+
+
+def numeric_range(size):
+    return "f{-%s..%s}" % ("9" * size, "1" + "0" * size)
+
+
+CASES = (
+    # (name, pattern of size, a matching name of size)
+    ("unclosed braces", unclosed_braces, unclosed_braces),
+    ("escaped braces", escaped_braces, None),
+    ("nested alternations", nested_alternations, lambda size: "b" + "x" * size),
+    ("nested braces", nested_braces, lambda size: "ac" * size + "x" * size),
+    ("numeric range", numeric_range, lambda size: "f-" + "8" * size),
+)
+
+
+def best_time(func, repeat=5):
+    timer = timeit.Timer(func)
+    number = max(1, timer.autorange()[0] // 10) if hasattr(timer, "autorange") else 10
+
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+
+    for name, make_pattern, make_name in CASES:
+        print("== %s" % name)
+        print("%8s %14s %8s %14s %8s" % ("size", "translate (s)", "ratio", "match (s)", "ratio"))
+
+        last_translate = last_match = None
+        for exponent in range(4, max_exponent + 1):
+            size = 2 ** exponent
+            pattern = make_pattern(size)
+
+            translate_time = best_time(lambda: translate(pattern))
+            get_cache().clear()
+            regex = cached_translate(pattern)
+
+            match_time = None
+            if regex is NEVER_MATCHING:
+                match_time = "rejected"
+            elif make_name:
+                file_name = make_name(size)
+                assert regex.match(file_name), (name, size)
+                match_time = best_time(lambda: regex.match(file_name))
+
+            print(
+                "%8d %14.6f %8s %14s %8s"
+                % (
+                    size,
+                    translate_time,
+                    "%.2f" % (translate_time / last_translate) if last_translate else "",
+                    "%.8f" % match_time if isinstance(match_time, float) else match_time or "",
+                    "%.2f" % (match_time / last_match)
+                    if isinstance(last_match, float) and isinstance(match_time, float)
+                    else "",
+                )
+            )
+
+            last_translate, last_match = translate_time, match_time
+
+
+if __name__ == "__main__":
+    main()
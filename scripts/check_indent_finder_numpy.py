@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Check that IndentFinder gives exactly the same results with and without its NumPy scanner.
+
+Buffers are generated randomly, with odd indentation, comments, backslash continuations and line endings,
+and the files of this repository are added. Each of them is parsed as a str, as bytes and as a memory-mapped file
+by the pure Python scanner and by the NumPy one. The counters, the numbers of processed lines and indent hints
+and the results have to be identical. Requires NumPy.
+
+Usage: python3 scripts/check_indent_finder_numpy.py [num_generated]
+"""
+
+import glob
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+sys.path.insert(0, os.path.join(PROJECT_DIR, "plugin", "libs"))
+
+from IndentFinder.indent_finder import IndentFinder, numpy  # noqa: E402
+
+INDENTS = (
+    "",
+    " ",
+    "  ",
+    "   ",
+    "    ",
+    "      ",
+    "        ",
+    "          ",
+    "\t",
+    "\t\t",
+    "\t  ",
+    "\t    ",
+    "\t\t   ",
+    " \t",
+)
+TEXTS = ("foo", "# c", "/* x", "* y", "bar \\", "x\\", "\\", "", "  ", "\t", "{", "}", "a\r", "\xe9", "\x0cq")
+# line endings, some of them are only line boundaries for str.splitlines()
+EOLS = ("\n",) * 20 + ("\r\n", "\r", " ", "\x0b")
+
+EDGE_CASES = (
+    "",
+    "\n",
+    "a",
+    " ",
+    "\\",
+    "\t/",
+    "  /",
+    "  /*x\n",
+    "  \n\n",
+    "\\\n  x\n    y",
+    "\xe9\n  \xfc\n    x\n\t\t  z",
+)
+
+
+def generate_buffer(rand, num_lines):
+    buffer = "".join(rand.choice(INDENTS) + rand.choice(TEXTS) + rand.choice(EOLS) for _ in range(num_lines))
+
+    # without a final line ending
+    if rand.random() < 0.5:
+        buffer += rand.choice(INDENTS) + rand.choice(TEXTS)
+
+    return buffer
+
+
+def get_repo_buffers():
+    buffers = []
+    for file_path in glob.glob(os.path.join(PROJECT_DIR, "**", "*.*"), recursive=True):
+        if os.path.isfile(file_path) and os.sep + ".git" + os.sep not in file_path:
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    buffers.append(f.read())
+            except (OSError, UnicodeDecodeError):
+                pass
+
+    return buffers
+
+
+def get_state(finder):
+    return (finder.lines, finder.nb_processed_lines, finder.nb_indent_hint, finder.results())
+
+
+def parse(parse_func, vectorized):
+    """
+    @brief Parse with the pure Python scanner or the NumPy one.
+
+    @return The state of the IndentFinder.
+    """
+
+    IndentFinder.VECTORIZE_MIN_SIZE = 0 if vectorized else float("inf")
+
+    finder = IndentFinder()
+    parse_func(finder)
+
+    return get_state(finder)
+
+
+def main():
+    if numpy is None:
+        sys.exit("NumPy is required")
+
+    num_generated = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rand = random.Random(1)
+
+    buffers = list(EDGE_CASES) + get_repo_buffers()
+    buffers += [generate_buffer(rand, rand.randrange(1, 400)) for _ in range(num_generated)]
+    # short buffers of random characters
+    buffers += ["".join(rand.choice("\t \n\\x#*/\xe9") for _ in range(rand.randrange(60))) for _ in range(2000)]
+
+    temp_dir = tempfile.mkdtemp()
+    num_checks = num_mismatches = 0
+
+    try:
+        for index, buffer in enumerate(buffers):
+            file_path = os.path.join(temp_dir, "%d.txt" % index)
+            with open(file_path, "w", encoding="utf-8", newline="") as f:
+                f.write(buffer)
+
+            parse_funcs = (
+                ("str", lambda finder: finder.parse_buffer(buffer)),
+                ("bytes", lambda finder: finder.parse_buffer(buffer.encode("utf-8"))),
+                # the file is memory-mapped if it is not empty
+                ("file", lambda finder: finder.parse_file(file_path)),
+            )
+
+            for kind, parse_func in parse_funcs:
+                num_checks += 1
+                expected, actual = parse(parse_func, False), parse(parse_func, True)
+
+                if expected != actual:
+                    num_mismatches += 1
+                    print("Mismatch (%s) for %r" % (kind, buffer[:80]))
+                    print("    pure Python: %r" % (expected,))
+                    print("    NumPy:       %r" % (actual,))
+
+            os.remove(file_path)
+    finally:
+        shutil.rmtree(temp_dir)
+
+    print("%d buffers, %d checks, %d mismatches" % (len(buffers), num_checks, num_mismatches))
+
+    sys.exit(1 if num_mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()